@@ -0,0 +1 @@
+"""Agents shared by the examples."""
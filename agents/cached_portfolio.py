@@ -0,0 +1,159 @@
+"""Agents that cache their portfolio between their own actions.
+
+Policies read ``agent.portfolio()``, ``agent.erc20_portfolio()`` and
+``agent.quantity(token)`` several times per block, and every read queries the
+balances of the agent on the backend. The balances of an agent only change when its
+own actions execute or when tokens are sent to it, so ``PortfolioCacheMixin`` keeps
+them until then:
+
+- ``quantity``, ``portfolio``, ``erc20_portfolio`` and ``erc721_portfolio`` are
+  cached until the agent executes an action or is funded through ``fund_erc20``,
+  ``fund_erc721``, ``fund_eth``, ``add_asset`` or ``add_nft``.
+- ``reward`` depends on prices as well and is cached until the next ``step`` of the
+  environment.
+
+Agents holding tokens whose balances change on their own, such as Aave aTokens, or
+with orders executed later by keepers, as on GMX, set ``PORTFOLIO_CACHE_PER_BLOCK``
+to refresh their portfolio every block instead.
+
+The environment has to report executed actions. ``CachedUniswapV3Env`` and
+``PrefetchingGmxV2Env`` do so with ``portfolio_cache_step``.
+"""
+from contextlib import ExitStack, contextmanager
+from decimal import Decimal
+from typing import Any, Callable, Iterable, Iterator, Optional, TypeVar
+
+from common.cache_stats import CacheStats
+
+from dojo.agents.uniswapV3 import PnLAgent, TotalWealthAgent
+from dojo.observations import BaseObservation
+
+T = TypeVar("T")
+
+
+class PortfolioCacheMixin:
+    """Cache the portfolio and reward of a dojo agent.
+
+    Put it before the dojo agent class in the bases of an agent class.
+    """
+
+    PORTFOLIO_CACHE_PER_BLOCK = False
+
+    backend: Any
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:  # noqa: D107
+        super().__init__(*args, **kwargs)
+        self._portfolio_cache: dict[tuple[Any, ...], Any] = {}
+        self._portfolio_block: Optional[int] = None
+        self._reward_cache: dict[Optional[int], float] = {}
+        self._executing = False
+        self.portfolio_cache_stats = CacheStats()
+
+    def invalidate_portfolio(self) -> None:
+        """Forget the cached balances and reward."""
+        self._portfolio_cache.clear()
+        self._reward_cache.clear()
+
+    def invalidate_reward(self) -> None:
+        """Forget the cached reward."""
+        self._reward_cache.clear()
+
+    @contextmanager
+    def executing(self) -> Iterator[None]:
+        """Read balances uncached while the actions of the agent execute."""
+        self.invalidate_portfolio()
+        self._executing = True
+        try:
+            yield
+        finally:
+            self._executing = False
+            self.invalidate_portfolio()
+
+    def _cached(self, key: tuple[Any, ...], read: Callable[..., T], *args: Any) -> T:
+        if self._executing:
+            return read(*args)
+        block = self.backend.block
+        if self.PORTFOLIO_CACHE_PER_BLOCK and block != self._portfolio_block:
+            self._portfolio_cache.clear()
+            self._portfolio_block = block
+        if key in self._portfolio_cache:
+            self.portfolio_cache_stats.hits += 1
+            return self._portfolio_cache[key]
+        self.portfolio_cache_stats.misses += 1
+        value = self._portfolio_cache[key] = read(*args)
+        return value
+
+    def quantity(self, token: str) -> Decimal:
+        """Balance of ``token``, cached until the portfolio changes."""
+        return self._cached(("quantity", token), super().quantity, token)
+
+    def portfolio(self) -> dict[str, Decimal]:
+        """All balances, cached until the portfolio changes."""
+        return dict(self._cached(("portfolio",), super().portfolio))
+
+    def erc20_portfolio(self) -> dict[str, Decimal]:
+        """ERC20 balances, cached until the portfolio changes."""
+        return dict(self._cached(("erc20_portfolio",), super().erc20_portfolio))
+
+    def erc721_portfolio(self) -> dict[str, list[int]]:
+        """ERC721 token ids, cached until the portfolio changes."""
+        holdings = self._cached(("erc721_portfolio",), super().erc721_portfolio)
+        return {token: list(token_ids) for token, token_ids in holdings.items()}
+
+    def reward(self, obs: BaseObservation) -> float:
+        """Reward of the agent, cached until the next environment step."""
+        if self._executing:
+            return super().reward(obs)  # type: ignore[misc]
+        if obs.block not in self._reward_cache:
+            self._reward_cache.clear()
+            self._reward_cache[obs.block] = super().reward(obs)  # type: ignore[misc]
+        return self._reward_cache[obs.block]
+
+    def fund_erc20(self, *args: Any, **kwargs: Any) -> None:  # noqa: D102
+        super().fund_erc20(*args, **kwargs)  # type: ignore[misc]
+        self.invalidate_portfolio()
+
+    def fund_erc721(self, *args: Any, **kwargs: Any) -> None:  # noqa: D102
+        super().fund_erc721(*args, **kwargs)  # type: ignore[misc]
+        self.invalidate_portfolio()
+
+    def fund_eth(self, *args: Any, **kwargs: Any) -> None:  # noqa: D102
+        super().fund_eth(*args, **kwargs)  # type: ignore[misc]
+        self.invalidate_portfolio()
+
+    def add_asset(self, *args: Any, **kwargs: Any) -> None:  # noqa: D102
+        super().add_asset(*args, **kwargs)  # type: ignore[misc]
+        self.invalidate_portfolio()
+
+    def add_nft(self, *args: Any, **kwargs: Any) -> None:  # noqa: D102
+        super().add_nft(*args, **kwargs)  # type: ignore[misc]
+        self.invalidate_portfolio()
+
+
+@contextmanager
+def portfolio_cache_step(
+    agents: Iterable[Any], actions: Iterable[Any]
+) -> Iterator[None]:
+    """Wrap an environment step that executes ``actions``.
+
+    Cached rewards are dropped because any action can move prices. Agents with
+    actions in the step read their balances uncached until it is done and start
+    with an empty cache afterwards.
+    """
+    acting = {id(getattr(action, "agent", None)) for action in actions}
+    with ExitStack() as stack:
+        for agent in agents:
+            if not isinstance(agent, PortfolioCacheMixin):
+                continue
+            agent.invalidate_reward()
+            if id(agent) in acting:
+                stack.enter_context(agent.executing())
+        yield
+
+
+class CachedTotalWealthAgent(PortfolioCacheMixin, TotalWealthAgent):
+    """``TotalWealthAgent`` with a cached portfolio."""
+
+
+class CachedPnLAgent(PortfolioCacheMixin, PnLAgent):
+    """``PnLAgent`` with a cached portfolio."""
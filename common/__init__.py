@@ -0,0 +1 @@
+"""Utilities shared by the examples."""
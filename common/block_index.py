@@ -0,0 +1,211 @@
+"""Persistent local index of block timestamps.
+
+Each chain has one ``.npy`` file holding a sorted ``(n, 2)`` int64 array of
+``(block, timestamp)`` samples. It is memory-mapped on first use and grows
+incrementally: any timestamp that has to be fetched over RPC is added to it, and
+whole block ranges can be filled ahead of a backtest. Lookups that fall inside
+known data are a binary search with no network round trip. The answers of
+time-to-block queries are kept the same way in a second file.
+
+New samples are buffered in memory and written in batches, on ``flush`` and at
+exit. Writing merges them under a file lock with what is on disk at that moment, so
+processes sharing the index do not drop each other's samples.
+
+    from common.block_index import block_to_datetime, time_to_block
+
+    start_block = time_to_block("2024-12-06 13:00:00", Chain.ETHEREUM)
+"""
+import atexit
+import fcntl
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterable, Optional
+
+import numpy as np
+
+from dojo.common.constants import Chain
+from dojo.config import cfg
+from dojo.network.block_date import block_to_timestamp, closest_block_lt
+
+DEFAULT_INDEX_DIR = Path(
+    os.environ.get(
+        "BLOCK_INDEX_DIR", Path.home() / ".cache" / "dojo_examples" / "block_index"
+    )
+)
+
+
+def _chain_name(chain: Chain) -> str:
+    return str(getattr(chain, "value", chain)).lower()
+
+
+def _parse_utc(datetime_string: str) -> datetime:
+    date = datetime.fromisoformat(datetime_string)
+    return date if date.tzinfo else date.replace(tzinfo=timezone.utc)
+
+
+def _load(path: Path) -> np.ndarray:
+    if path.exists():
+        return np.load(path, mmap_mode="r")
+    return np.empty((0, 2), dtype=np.int64)
+
+
+def _merge(path: Path, new: dict[int, int]) -> np.ndarray:
+    """Merge ``new`` key-value pairs into the sorted array at ``path``.
+
+    :returns: The memory-mapped merged array.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path.with_suffix(".lock"), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        added = np.array(list(new.items()), dtype=np.int64).reshape(-1, 2)
+        # Samples of this process win over those on disk, which agree anyway.
+        merged = np.concatenate([added, _load(path)])
+        _, first = np.unique(merged[:, 0], return_index=True)
+        tmp_path = path.with_suffix(".tmp.npy")
+        np.save(tmp_path, merged[first])
+        os.replace(tmp_path, path)
+    return _load(path)
+
+
+class BlockTimestampIndex:
+    """Block timestamps of one chain, kept on disk.
+
+    :param chain: The chain the blocks are on.
+    :param root: Directory of the index files.
+    :param flush_every: Number of new samples buffered before they are written.
+    """
+
+    def __init__(
+        self, chain: Chain, root: Path = DEFAULT_INDEX_DIR, flush_every: int = 4096
+    ) -> None:
+        """Memory-map the index of ``chain`` if it exists."""
+        self.chain = chain
+        self.path = Path(root) / f"{_chain_name(chain)}.npy"
+        self.queries_path = Path(root) / f"{_chain_name(chain)}.queries.npy"
+        self.flush_every = flush_every
+        self._lock = threading.Lock()
+        self.samples = _load(self.path)
+        self.queries = _load(self.queries_path)
+        self._new_samples: dict[int, int] = {}
+        self._new_queries: dict[int, int] = {}
+        atexit.register(self.flush)
+
+    @property
+    def blocks(self) -> np.ndarray:
+        """Known block numbers written to disk, ascending."""
+        return self.samples[:, 0]
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        """Timestamps in seconds of ``blocks``."""
+        return self.samples[:, 1]
+
+    def _fetch(self, block: int) -> int:
+        return int(block_to_timestamp(cfg.network.rpc_url(self.chain), block))
+
+    def add(self, samples: Iterable[tuple[int, int]]) -> None:
+        """Add ``(block, timestamp)`` samples, written once enough are buffered."""
+        with self._lock:
+            self._new_samples.update(samples)
+            pending = len(self._new_samples)
+        if pending >= self.flush_every:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write the buffered samples and query answers to disk."""
+        with self._lock:
+            if self._new_samples:
+                self.samples = _merge(self.path, self._new_samples)
+                self._new_samples = {}
+            if self._new_queries:
+                self.queries = _merge(self.queries_path, self._new_queries)
+                self._new_queries = {}
+
+    def lookup(self, block: int) -> Optional[int]:
+        """Timestamp of ``block`` if it is in the index."""
+        timestamp = self._new_samples.get(block)
+        if timestamp is not None:
+            return timestamp
+        i = int(np.searchsorted(self.blocks, block))
+        if i < len(self.samples) and self.blocks[i] == block:
+            return int(self.timestamps[i])
+        return None
+
+    def fill(self, from_block: int, to_block: int, max_workers: int = 8) -> None:
+        """Fetch the timestamps of all blocks in the range missing from the index.
+
+        Call this before a backtest to answer every per-block lookup locally.
+        """
+        wanted = np.arange(from_block, to_block + 1, dtype=np.int64)
+        missing = [
+            block
+            for block in wanted[~np.isin(wanted, self.blocks)].tolist()
+            if block not in self._new_samples
+        ]
+        with ThreadPoolExecutor(max_workers) as pool:
+            timestamps = list(pool.map(self._fetch, missing))
+        self.add(zip(missing, timestamps))
+        self.flush()
+
+    def block_to_timestamp(self, block: int) -> int:
+        """Timestamp in seconds of ``block``, fetched and indexed if unknown."""
+        timestamp = self.lookup(block)
+        if timestamp is None:
+            timestamp = self._fetch(block)
+            self.add([(block, timestamp)])
+        return timestamp
+
+    def block_to_datetime(self, block: int) -> datetime:
+        """UTC datetime of ``block``."""
+        return datetime.fromtimestamp(self.block_to_timestamp(block), tz=timezone.utc)
+
+    def timestamp_to_block(self, timestamp: int) -> int:
+        """Latest block with a timestamp before ``timestamp``.
+
+        This is answered locally when the index holds the two consecutive blocks
+        around ``timestamp`` or the same query was answered before. Otherwise dojo's
+        ``closest_block_lt`` is asked once, like ``dojo.common.time_to_block`` does,
+        and its answer is kept.
+        """
+        i = int(np.searchsorted(self.timestamps, timestamp, side="left")) - 1
+        if 0 <= i < len(self.samples) - 1 and self.blocks[i + 1] == self.blocks[i] + 1:
+            return int(self.blocks[i])
+        block = self._new_queries.get(timestamp)
+        if block is not None:
+            return block
+        j = int(np.searchsorted(self.queries[:, 0], timestamp))
+        if j < len(self.queries) and self.queries[j, 0] == timestamp:
+            return int(self.queries[j, 1])
+
+        block = int(closest_block_lt(timestamp, self.chain))  # type: ignore[arg-type]
+        with self._lock:
+            self._new_queries[timestamp] = block
+        return block
+
+    def time_to_block(self, datetime_string: str) -> int:
+        """Latest block before a UTC time such as ``"2024-12-06 13:00:00"``."""
+        return self.timestamp_to_block(int(_parse_utc(datetime_string).timestamp()))
+
+
+_indexes: dict[str, BlockTimestampIndex] = {}
+
+
+def block_index(chain: Chain) -> BlockTimestampIndex:
+    """The shared index of ``chain``."""
+    name = _chain_name(chain)
+    if name not in _indexes:
+        _indexes[name] = BlockTimestampIndex(chain)
+    return _indexes[name]
+
+
+def time_to_block(datetime_string: str, chain: Chain) -> int:
+    """Drop-in replacement for ``dojo.common.time_to_block`` backed by the index."""
+    return block_index(chain).time_to_block(datetime_string)
+
+
+def block_to_datetime(block: int, chain: Chain) -> datetime:
+    """UTC datetime of ``block`` on ``chain``, backed by the index."""
+    return block_index(chain).block_to_datetime(block)
@@ -0,0 +1,16 @@
+"""Hit and miss counters of the in-memory caches."""
+from dataclasses import dataclass
+
+
+@dataclass
+class CacheStats:
+    """Hits and misses of a cache."""
+
+    hits: int = 0
+    misses: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Share of calls answered from the cache."""
+        calls = self.hits + self.misses
+        return self.hits / calls if calls else 0.0
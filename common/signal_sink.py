@@ -0,0 +1,189 @@
+"""Buffered columnar recording of policy signals.
+
+``obs.add_signal(name, value)`` records every value on its own. A ``SignalSink``
+gives every signal a compact integer id once and appends its values to preallocated
+float64 columns, one per signal. A column is written to the output store in a
+single batch when it is full and all columns are written on ``flush`` or
+``close``. Signals can be sampled every n blocks to record less of them, and a
+sink can subscribe to some signals only.
+
+Policies registering signals lazily, with ``obs.add_lazy_signal``, only compute a
+value when a sink wants it for the block, see ``wants``.
+
+The output store is an SQLite database with one row per recorded value. An
+environment given a sink no longer records signals through dojo, unless it is also
+passed ``dojo_signals=True`` to keep the dashboard:
+
+    with SignalSink("signals.db", sample_every={"Swap volume": 100}) as sink:
+        env = CachedUniswapV3Env(..., signal_sink=sink)
+        backtest_run(env, ...)
+
+    blocks, values = read_signal("signals.db", "Swap volume")
+"""
+import sqlite3
+from contextlib import closing
+from decimal import Decimal
+from pathlib import Path
+from types import TracebackType
+from typing import Iterable, Optional, Union
+
+import numpy as np
+
+
+class _Column:
+    """Preallocated buffers of one signal."""
+
+    def __init__(self, db_id: int, capacity: int, sample_every: int) -> None:
+        self.db_id = db_id
+        self.blocks = np.empty(capacity, dtype=np.int64)
+        self.values = np.empty(capacity, dtype=np.float64)
+        self.size = 0
+        self.sample_every = sample_every
+
+
+class SignalSink:
+    """Record signals into per-signal columns flushed to SQLite in batches.
+
+    :param path: SQLite database the signals are written to.
+    :param capacity: Number of values buffered per signal before it is flushed.
+    :param sample_every: Record the named signals only every n blocks.
+    :param default_sample_every: Sampling of all other signals.
+    :param signals: Names of the signals to record. All signals when omitted.
+    """
+
+    def __init__(  # noqa: D107
+        self,
+        path: Union[str, Path],
+        capacity: int = 4096,
+        sample_every: Optional[dict[str, int]] = None,
+        default_sample_every: int = 1,
+        signals: Optional[Iterable[str]] = None,
+    ) -> None:
+        self.path = Path(path)
+        self.signals = None if signals is None else frozenset(signals)
+        self.capacity = capacity
+        self.sample_every = sample_every or {}
+        self.default_sample_every = default_sample_every
+        self.ids: dict[str, int] = {}
+        self._columns: list[_Column] = []
+        self._connection = sqlite3.connect(self.path)
+        self._connection.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS signals (
+                id INTEGER PRIMARY KEY, name TEXT UNIQUE NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS signal_values (
+                signal_id INTEGER NOT NULL, block INTEGER NOT NULL, value REAL
+            );
+            """
+        )
+
+    def register(self, name: str, sample_every: Optional[int] = None) -> int:
+        """Id of the signal ``name``, registering it on first use.
+
+        :param name: Name of the signal.
+        :param sample_every: Record it only every n blocks. Defaults to the sampling
+            given to the sink.
+        :raises ValueError: When the sink is not subscribed to the signal.
+        """
+        signal_id = self.ids.get(name)
+        if signal_id is not None:
+            return signal_id
+        if not self.subscribed(name):
+            raise ValueError(f"The sink is not subscribed to the signal {name!r}.")
+        self._connection.execute(
+            "INSERT OR IGNORE INTO signals (name) VALUES (?)", (name,)
+        )
+        (db_id,) = self._connection.execute(
+            "SELECT id FROM signals WHERE name = ?", (name,)
+        ).fetchone()
+        if sample_every is None:
+            sample_every = self.sample_every.get(name, self.default_sample_every)
+        signal_id = self.ids[name] = len(self._columns)
+        self._columns.append(_Column(db_id, self.capacity, sample_every))
+        return signal_id
+
+    def subscribed(self, name: str) -> bool:
+        """Whether the sink records the signal ``name`` at all."""
+        return self.signals is None or name in self.signals
+
+    def wants(self, name: str, block: int) -> bool:
+        """Whether the sink records the signal ``name`` at ``block``."""
+        signal_id = self.ids.get(name)
+        if signal_id is not None:
+            return not block % self._columns[signal_id].sample_every
+        if not self.subscribed(name):
+            return False
+        return not block % self.sample_every.get(name, self.default_sample_every)
+
+    def record(
+        self, signal_id: int, block: int, value: Union[float, int, Decimal]
+    ) -> None:
+        """Append the value of a registered signal at ``block``."""
+        column = self._columns[signal_id]
+        if block % column.sample_every:
+            return
+        column.blocks[column.size] = block
+        column.values[column.size] = value
+        column.size += 1
+        if column.size == self.capacity:
+            self._flush_column(column)
+
+    def add(self, name: str, block: int, value: Union[float, int, Decimal]) -> None:
+        """Append the value of the signal ``name``, registering it if needed.
+
+        Signals the sink is not subscribed to are ignored.
+        """
+        signal_id = self.ids.get(name)
+        if signal_id is None:
+            if not self.subscribed(name):
+                return
+            signal_id = self.register(name)
+        self.record(signal_id, block, value)
+
+    def _flush_column(self, column: _Column) -> None:
+        if not column.size:
+            return
+        self._connection.executemany(
+            "INSERT INTO signal_values (signal_id, block, value) VALUES (?, ?, ?)",
+            zip(
+                [column.db_id] * column.size,
+                column.blocks[: column.size].tolist(),
+                column.values[: column.size].tolist(),
+            ),
+        )
+        column.size = 0
+
+    def flush(self) -> None:
+        """Write all buffered values to the database."""
+        for column in self._columns:
+            self._flush_column(column)
+        self._connection.commit()
+
+    def close(self) -> None:
+        """Flush and close the database."""
+        self.flush()
+        self._connection.close()
+
+    def __enter__(self) -> "SignalSink":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[type[BaseException]],
+        exc: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+
+def read_signal(path: Union[str, Path], name: str) -> tuple[np.ndarray, np.ndarray]:
+    """Blocks and values of one signal written by a ``SignalSink``, by block."""
+    with closing(sqlite3.connect(path)) as connection:
+        rows = connection.execute(
+            "SELECT block, value FROM signal_values JOIN signals ON signal_id = id "
+            "WHERE name = ? ORDER BY block",
+            (name,),
+        ).fetchall()
+    data = np.array(rows, dtype=np.float64).reshape(-1, 2)
+    return data[:, 0].astype(np.int64), data[:, 1]
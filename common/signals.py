@@ -0,0 +1,30 @@
+"""Recording policy signals on any observation."""
+from decimal import Decimal
+from typing import Callable, Iterable, Mapping, Union
+
+from dojo.observations import BaseObservation
+
+SignalValue = Union[float, int, Decimal]
+
+
+def add_lazy_signals(
+    obs: BaseObservation,
+    names: Iterable[str],
+    compute: Callable[[], Mapping[str, SignalValue]],
+) -> None:
+    """Record signals computed together, only computing them when recorded.
+
+    Observations with lazy signals, such as ``CachedUniswapV3Observation``, call
+    ``compute`` only in blocks in which one of the signals is recorded. Other
+    observations record all of them every block.
+
+    :param obs: The observation of the current block.
+    :param names: Names of the signals ``compute`` returns.
+    :param compute: Returns the value of every signal by name.
+    """
+    add_lazy = getattr(obs, "add_lazy_signals", None)
+    if add_lazy is not None:
+        add_lazy(names, compute)
+        return
+    for name, value in compute().items():
+        obs.add_signal(name, value)
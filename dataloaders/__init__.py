@@ -0,0 +1 @@
+"""Dataloaders shared by the examples."""
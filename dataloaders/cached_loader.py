@@ -0,0 +1,233 @@
+"""Persistent on-disk cache of Uniswap V3 replay events.
+
+Events are cached in segments, one per chain, pool, event subset and contiguous
+block range. A query is answered from the cached segments it overlaps and only the
+blocks no segment covers are fetched from the wrapped loader. The new events are
+written back merged with the segments they touch, so each pool keeps a few large
+segments rather than one per query.
+
+Segment files are named after a hash of their key and the least recently used ones
+are evicted once the cache grows beyond its size cap.
+
+Loaders sharing a cache directory, e.g. parallel backtests, take a lock on it for
+every update of the index, and segment files are replaced atomically. A loader
+waits while another one fetches, then finds the blocks it fetched in the cache.
+"""
+import fcntl
+import hashlib
+import heapq
+import json
+import os
+import pickle
+import tempfile
+import time
+from contextlib import contextmanager
+from operator import attrgetter
+from pathlib import Path
+from typing import Any, Iterator, Literal, Optional, TypedDict
+
+from dojo.common.constants import Chain
+from dojo.dataloaders import UniswapV3Loader
+from dojo.dataloaders.base_uniswapV3_loader import BaseUniswapV3Loader
+from dojo.dataloaders.formats import UniswapV3Event
+
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "dojo_examples" / "uniswapV3_events"
+DEFAULT_MAX_BYTES = 2 * 1024**3
+
+_Subset = Optional[list[Literal["Burn", "Mint", "Swap"]]]
+
+
+class Segment(TypedDict):
+    """Index entry of one cached segment."""
+
+    key: str
+    from_block: int
+    to_block: int
+    file: str
+    size: int
+    last_used: float
+
+
+def _segment_key(chain: Chain, pool: str, subset: _Subset) -> str:
+    actions = ",".join(sorted(subset)) if subset else "*"
+    return f"{chain}|{pool.lower()}|{actions}"
+
+
+def _gaps(
+    segments: list[Segment], from_block: int, to_block: int
+) -> list[tuple[int, int]]:
+    """Block ranges in [from_block, to_block] that no segment covers."""
+    gaps = []
+    next_block = from_block
+    for segment in sorted(segments, key=lambda s: s["from_block"]):
+        if segment["from_block"] > next_block:
+            gaps.append((next_block, segment["from_block"] - 1))
+        next_block = max(next_block, segment["to_block"] + 1)
+    if next_block <= to_block:
+        gaps.append((next_block, to_block))
+    return gaps
+
+
+class CachedUniswapV3Loader(BaseUniswapV3Loader):
+    """Serve Uniswap V3 events from a local cache, fetching only what is missing.
+
+    Pass it to the market agent in place of the default loader:
+
+        HistoricReplayAgent(..., Dataloader=CachedUniswapV3Loader)
+
+    :param cache_dir: Directory holding the segments and their index.
+    :param max_bytes: Size cap of the cache. Least recently used segments are
+        evicted when it is exceeded.
+    :param loader: The loader to fetch missing blocks with. Defaults to the dojo
+        ``UniswapV3Loader``.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path = DEFAULT_CACHE_DIR,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        loader: Optional[BaseUniswapV3Loader] = None,
+    ) -> None:  # noqa: D107
+        super().__init__()
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.loader = loader if loader is not None else UniswapV3Loader()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._index_path = self.cache_dir / "index.json"
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Hold the lock on the cache directory."""
+        with open(self.cache_dir / "index.lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            yield
+
+    def _read_index(self) -> list[Segment]:
+        try:
+            with open(self._index_path, "r") as f:
+                return json.load(f)  # type: ignore[no-any-return]
+        except FileNotFoundError:
+            return []
+
+    def _write_index(self, segments: list[Segment]) -> None:
+        tmp_path = self._index_path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(segments, f)
+        os.replace(tmp_path, self._index_path)
+
+    def _read_segment(self, segment: Segment) -> list[UniswapV3Event]:
+        with open(self.cache_dir / segment["file"], "rb") as f:
+            return pickle.load(f)  # type: ignore[no-any-return]
+
+    def _write_segment(
+        self, key: str, from_block: int, to_block: int, events: list[UniswapV3Event]
+    ) -> Segment:
+        name = hashlib.sha256(f"{key}|{from_block}|{to_block}".encode()).hexdigest()
+        path = self.cache_dir / f"{name}.pkl"
+        # A merged segment can take the name of one it replaces.
+        with tempfile.NamedTemporaryFile(
+            "wb", dir=self.cache_dir, suffix=".tmp", delete=False
+        ) as f:
+            pickle.dump(events, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(f.name, path)
+        return Segment(
+            key=key,
+            from_block=from_block,
+            to_block=to_block,
+            file=path.name,
+            size=path.stat().st_size,
+            last_used=time.time(),
+        )
+
+    def _remove_segment(self, segment: Segment) -> None:
+        (self.cache_dir / segment["file"]).unlink(missing_ok=True)
+
+    def _evict(self, segments: list[Segment], keep: list[Segment]) -> list[Segment]:
+        """Drop least recently used segments until the cache fits its size cap."""
+        total = sum(segment["size"] for segment in segments)
+        remaining = []
+        for segment in sorted(segments, key=lambda s: s["last_used"]):
+            if total > self.max_bytes and segment not in keep:
+                self._remove_segment(segment)
+                total -= segment["size"]
+            else:
+                remaining.append(segment)
+        return remaining
+
+    def _load_pool(
+        self,
+        segments: list[Segment],
+        chain: Chain,
+        pool: str,
+        from_block: int,
+        to_block: int,
+        subset: _Subset,
+    ) -> tuple[list[UniswapV3Event], Segment]:
+        """Load the events of one pool and update ``segments`` in place."""
+        key = _segment_key(chain, pool, subset)
+        # Adjacent segments are included so that they get merged with new events.
+        touching = [
+            s
+            for s in segments
+            if s["key"] == key
+            and s["from_block"] <= to_block + 1
+            and s["to_block"] >= from_block - 1
+        ]
+        gaps = _gaps(touching, from_block, to_block)
+        if not gaps and len(touching) == 1:
+            touching[0]["last_used"] = time.time()
+            events = self._read_segment(touching[0])
+            return events, touching[0]
+
+        parts = [self._read_segment(segment) for segment in touching]
+        for gap_from, gap_to in gaps:
+            parts.append(
+                self.loader._load_data(chain, [pool], gap_from, gap_to, subset)
+            )
+        events = list(heapq.merge(*parts, key=attrgetter("block", "log_index")))
+
+        merged = self._write_segment(
+            key,
+            min([from_block] + [s["from_block"] for s in touching]),
+            max([to_block] + [s["to_block"] for s in touching]),
+            events,
+        )
+        for segment in touching:
+            segments.remove(segment)
+            if segment["file"] != merged["file"]:
+                self._remove_segment(segment)
+        segments.append(merged)
+        return events, merged
+
+    def _load_data(self, chain: Chain, pool_addresses: list[str], from_block: int, to_block: int, subset: _Subset = None) -> list[UniswapV3Event]:  # type: ignore[override]
+        """Load events from the cache, fetching the blocks it does not cover."""
+        per_pool: list[list[UniswapV3Event]] = []
+        used: list[Segment] = []
+        with self._locked():
+            segments = self._read_index()
+            for pool in pool_addresses:
+                events, segment = self._load_pool(
+                    segments, chain, pool, from_block, to_block, subset
+                )
+                per_pool.append(
+                    [e for e in events if from_block <= e.block <= to_block]
+                )
+                used.append(segment)
+            self._write_index(self._evict(segments, keep=used))
+        return list(heapq.merge(*per_pool, key=attrgetter("block", "log_index")))
+
+    def clear(self) -> None:
+        """Remove every cached segment."""
+        with self._locked():
+            for segment in self._read_index():
+                self._remove_segment(segment)
+            self._write_index([])
+
+    def info(self) -> dict[str, Any]:
+        """Number of segments and bytes held by the cache."""
+        segments = self._read_index()
+        return {
+            "segments": len(segments),
+            "bytes": sum(segment["size"] for segment in segments),
+            "max_bytes": self.max_bytes,
+        }
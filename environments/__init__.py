@@ -0,0 +1 @@
+"""Environments shared by the examples."""
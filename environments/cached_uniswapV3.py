@@ -0,0 +1,219 @@
+"""Uniswap V3 environment whose observation memoizes read-only queries.
+
+Policies often ask the observation for the same price, tick range or pool metadata
+several times while handling one block, and every call is a round trip to the EVM
+backend. ``CachedUniswapV3Observation`` answers repeated queries from memory:
+
+- ``pool_tokens``, ``tick_spacing`` and ``token_decimals`` never change and are
+  kept for the whole run.
+- ``price``, ``slot0``, ``liquidity`` and ``active_tick_range`` are kept until the
+  block advances or actions are executed.
+
+``CachedUniswapV3Env`` is a drop-in replacement for ``UniswapV3Env`` that installs
+the cached observation and invalidates it at the right times. It also prefetches
+the data requirements policies declare, see ``environments.requirements``, and
+can record signals into a ``SignalSink`` instead of through dojo. Signals added with
+``add_lazy_signal`` are only computed in blocks in which they are recorded, so
+headless runs skip them entirely.
+"""
+import threading
+from decimal import Decimal
+from typing import Any, Callable, Generator, Iterable, Mapping, Optional, Union
+
+import numpy as np
+from agents.cached_portfolio import portfolio_cache_step
+from common.cache_stats import CacheStats
+from common.signal_sink import SignalSink
+from environments.requirements import prefetch
+from policies.requirements import Snapshot
+
+from dojo.actions.uniswapV3 import UniswapV3Action
+from dojo.environments import UniswapV3Env
+from dojo.network.base_backend import BaseBackend
+from dojo.observations.uniswapV3 import UniswapV3Observation
+
+
+class CachedUniswapV3Observation(UniswapV3Observation):
+    """A ``UniswapV3Observation`` that memoizes read-only queries.
+
+    :param pools: The pools of the environment.
+    :param backend: The backend queries are sent to on a miss.
+    :param signal_sink: Sink ``add_signal`` records into, if any.
+    :param dojo_signals: Also record signals through dojo, for the dashboard and
+        the output database. Defaults to True without a sink and to False with one,
+        so each value is recorded once. Without a sink and with this off, signals
+        are dropped.
+    """
+
+    def __init__(  # noqa: D107
+        self,
+        pools: list[str],
+        backend: BaseBackend,
+        signal_sink: Optional[SignalSink] = None,
+        dojo_signals: Optional[bool] = None,
+    ) -> None:
+        super().__init__(pools, backend)
+        self.signal_sink = signal_sink
+        if dojo_signals is None:
+            dojo_signals = signal_sink is None
+        self.dojo_signals = dojo_signals
+        self._static: dict[tuple[Any, ...], Any] = {}
+        self._per_block: dict[tuple[Any, ...], Any] = {}
+        self._cached_block: Optional[int] = None
+        self.cache_stats: dict[str, CacheStats] = {}
+        self.snapshot = Snapshot()
+        # Prefetching reads requirements from several threads.
+        self._lock = threading.Lock()
+
+    def invalidate(self) -> None:
+        """Forget all state that can change, e.g. after actions were executed."""
+        self._per_block.clear()
+
+    def cache_totals(self) -> CacheStats:
+        """Hits and misses summed over all cached queries."""
+        return CacheStats(
+            hits=sum(stats.hits for stats in self.cache_stats.values()),
+            misses=sum(stats.misses for stats in self.cache_stats.values()),
+        )
+
+    def _block_cache(self) -> dict[tuple[Any, ...], Any]:
+        if self.block != self._cached_block:
+            self._per_block.clear()
+            self._cached_block = self.block
+        return self._per_block
+
+    def _cached(
+        self,
+        cache: dict[tuple[Any, ...], Any],
+        query: Callable[..., Any],
+        *args: Any,
+    ) -> Any:
+        name = query.__name__
+        key = (name, *args)
+        with self._lock:
+            stats = self.cache_stats.setdefault(name, CacheStats())
+            if key in cache:
+                stats.hits += 1
+                return cache[key]
+            stats.misses += 1
+        value = query(*args)
+        with self._lock:
+            cache[key] = value
+        return value
+
+    def add_signal(self, name: str, value: Union[float, int, Decimal]) -> None:
+        """Record a signal in the sink and, if enabled, through dojo."""
+        if self.signal_sink is not None:
+            self.signal_sink.add(name, self.block, value)
+        if self.dojo_signals:
+            super().add_signal(name, value)
+
+    def wants_signal(self, name: str) -> bool:
+        """Whether a value of the signal ``name`` would be recorded in this block."""
+        if self.dojo_signals:
+            return True
+        return self.signal_sink is not None and self.signal_sink.wants(name, self.block)
+
+    def add_lazy_signal(
+        self, name: str, compute: Callable[[], Union[float, int, Decimal]]
+    ) -> None:
+        """Record ``compute()`` as a signal, calling it only if the value is wanted."""
+        if self.wants_signal(name):
+            self.add_signal(name, compute())
+
+    def add_lazy_signals(
+        self,
+        names: Iterable[str],
+        compute: Callable[[], Mapping[str, Union[float, int, Decimal]]],
+    ) -> None:
+        """Record signals computed together, calling ``compute`` only if one is wanted.
+
+        :param names: Names of the signals ``compute`` returns.
+        :param compute: Returns the value of every signal by name.
+        """
+        wanted = [name for name in names if self.wants_signal(name)]
+        if not wanted:
+            return
+        values = compute()
+        for name in wanted:
+            self.add_signal(name, values[name])
+
+    def pool_tokens(self, pool: str) -> tuple[str, str]:
+        """Symbols of the tokens of ``pool``, kept for the whole run."""
+        return self._cached(self._static, super().pool_tokens, pool)
+
+    def tick_spacing(self, pool: str) -> int:
+        """Tick spacing of ``pool``, kept for the whole run."""
+        return self._cached(self._static, super().tick_spacing, pool)
+
+    def token_decimals(self, token: str) -> int:
+        """Decimals of ``token``, kept for the whole run."""
+        return self._cached(self._static, super().token_decimals, token)
+
+    def price(self, token: str, unit: str, pool: str) -> Decimal:
+        """Price of ``token`` in ``unit`` on ``pool``, kept for the block."""
+        return self._cached(self._block_cache(), super().price, token, unit, pool)
+
+    def slot0(self, pool: str) -> list[Any]:
+        """Slot0 of ``pool``, kept for the block."""
+        return list(self._cached(self._block_cache(), super().slot0, pool))
+
+    def liquidity(self, pool: str) -> int:
+        """Active liquidity of ``pool``, kept for the block."""
+        return self._cached(self._block_cache(), super().liquidity, pool)
+
+    def active_tick_range(self, pool: str) -> tuple[int, int]:
+        """Active tick range of ``pool``, kept for the block."""
+        return self._cached(self._block_cache(), super().active_tick_range, pool)
+
+
+class CachedUniswapV3Env(UniswapV3Env):
+    """``UniswapV3Env`` with a ``CachedUniswapV3Observation``.
+
+    Takes the same arguments as ``UniswapV3Env`` plus ``signal_sink`` and
+    ``dojo_signals``, see ``CachedUniswapV3Observation``. Given a sink, signals are
+    only recorded into it unless ``dojo_signals=True`` is passed. The cached state
+    is dropped when a new block starts and around every ``step``, which executes the
+    actions of all agents. At the start of every block the data requirements of all
+    policies are fetched once and published as ``obs.snapshot``.
+    """
+
+    def __init__(  # noqa: D107
+        self,
+        *args: Any,
+        signal_sink: Optional[SignalSink] = None,
+        dojo_signals: Optional[bool] = None,
+        **kwargs: Any,
+    ) -> None:
+        self.signal_sink = signal_sink
+        self.dojo_signals = dojo_signals
+        super().__init__(*args, **kwargs)
+        self._install_cached_observation()
+
+    def _install_cached_observation(self) -> CachedUniswapV3Observation:
+        if not isinstance(self.obs, CachedUniswapV3Observation):
+            self.obs = CachedUniswapV3Observation(
+                self.obs.pools, self.obs.backend, self.signal_sink, self.dojo_signals
+            )
+        return self.obs
+
+    def reset(self) -> CachedUniswapV3Observation:
+        """Reset the environment and return its cached observation."""
+        super().reset()
+        return self._install_cached_observation()
+
+    def iter_block(self, *args: Any, **kwargs: Any) -> Generator[int, None, None]:
+        """Iterate over blocks like ``UniswapV3Env``, starting each with no cache."""
+        for block in super().iter_block(*args, **kwargs):
+            self.obs.invalidate()
+            self.obs.snapshot = prefetch(self.obs, self.agents)
+            yield block
+
+    def step(self, actions: list[UniswapV3Action]) -> np.ndarray:
+        """Execute the actions, never serving state read before them."""
+        self.obs.invalidate()
+        try:
+            with portfolio_cache_step(self.agents, actions):
+                return super().step(actions)
+        finally:
+            self.obs.invalidate()
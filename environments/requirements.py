@@ -0,0 +1,96 @@
+"""Prefetching of the per-block data requirements declared by policies.
+
+Policies declare what they read each block with ``data_requirements``, see
+``policies.requirements``. Before the policies of a block are asked for actions,
+the environment collects the requirements of all agents, fetches each distinct one
+once and publishes the values as ``obs.snapshot``. Agents that need the same data
+share a single read, so the number of backend queries no longer grows with the
+number of agents. On RPC backends the reads are sent concurrently, so prefetching a
+block costs about one round trip instead of one per requirement.
+
+``CachedUniswapV3Env`` and ``PrefetchingGmxV2Env`` do this. With the cached Uniswap
+V3 observation the prefetched values also fill its cache, so plain ``obs.price``
+calls in ``predict`` are answered from memory too.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Generator, Iterable
+
+import numpy as np
+from agents.cached_portfolio import portfolio_cache_step
+from policies.requirements import Requirement, Snapshot
+
+from dojo.actions.gmxV2 import BaseGmxAction
+from dojo.agents import BaseAgent
+from dojo.environments import GmxV2Env
+from dojo.network import LocalBackend
+from dojo.observations import BaseObservation
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of requirements read at the same time.
+PREFETCH_WORKERS = 8
+
+
+@lru_cache
+def _executor(max_workers: int) -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers, thread_name_prefix="prefetch")
+
+
+def collect_requirements(
+    agents: Iterable[BaseAgent[Any]], obs: BaseObservation
+) -> list[Requirement]:
+    """The distinct requirements of all agents whose policy declares any."""
+    requirements: dict[Requirement, None] = {}
+    for agent in agents:
+        declare = getattr(getattr(agent, "policy", None), "data_requirements", None)
+        if declare is not None:
+            requirements.update(dict.fromkeys(declare(obs)))
+    return list(requirements)
+
+
+def prefetch(
+    obs: BaseObservation,
+    agents: Iterable[BaseAgent[Any]],
+    max_workers: int = PREFETCH_WORKERS,
+) -> Snapshot:
+    """Fetch the requirements of all agents once and return them as a snapshot.
+
+    Each read of a forked or live backend is a JSON-RPC request, so the reads are
+    sent concurrently. The local backend runs the EVM in this process and is read
+    one requirement at a time.
+
+    :param obs: The observation of the current block.
+    :param agents: The agents whose policies declare requirements.
+    :param max_workers: Maximum number of reads in flight, 1 reads them in order.
+    """
+    requirements = collect_requirements(agents, obs)
+    local = isinstance(getattr(obs, "backend", None), LocalBackend)
+    if local or max_workers < 2 or len(requirements) < 2:
+        values = [requirement.fetch(obs) for requirement in requirements]
+    else:
+        executor = _executor(max_workers)
+        values = list(executor.map(lambda r: r.fetch(obs), requirements))
+    snapshot = Snapshot(obs.block, dict(zip(requirements, values)))
+    logger.debug(f"Prefetched {len(snapshot)} requirements for block {obs.block}.")
+    return snapshot
+
+
+class PrefetchingGmxV2Env(GmxV2Env):
+    """``GmxV2Env`` that publishes the prefetched requirements as ``obs.snapshot``.
+
+    Takes the same arguments as ``GmxV2Env``. It also reports executed actions to
+    agents with a cached portfolio.
+    """
+
+    def iter_block(self, *args: Any, **kwargs: Any) -> Generator[int, None, None]:
+        """Iterate over blocks like ``GmxV2Env``, prefetching before each one."""
+        for block in super().iter_block(*args, **kwargs):
+            self.obs.snapshot = prefetch(self.obs, self.agents)
+            yield block
+
+    def step(self, actions: list[BaseGmxAction]) -> np.ndarray:
+        """Execute the actions like ``GmxV2Env``."""
+        with portfolio_cache_step(self.agents, actions):
+            return super().step(actions)
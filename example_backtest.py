@@ -5,13 +5,14 @@ One active one passive.
 from decimal import Decimal
 from typing import Any, Optional
 
+from agents.cached_portfolio import CachedTotalWealthAgent
+from common.block_index import time_to_block
+from dataloaders.cached_loader import CachedUniswapV3Loader
+from environments.cached_uniswapV3 import CachedUniswapV3Env
 from examples.moving_averages.policy import MovingAveragePolicy
 from policies.passiveLP import PassiveConcentratedLP
 
-from dojo.agents.uniswapV3 import TotalWealthAgent
-from dojo.common import time_to_block
 from dojo.common.constants import Chain
-from dojo.environments import UniswapV3Env
 from dojo.market_agents.uniswapV3 import HistoricReplayAgent
 from dojo.runners import backtest_run
 
@@ -29,18 +30,22 @@ def main(
     pools = ["USDC/WETH-0.05"]
     start_time = "2024-12-06 13:00:00"
     chain = Chain.ETHEREUM
-    block_range = (
-        time_to_block(start_time, chain),
-        time_to_block(start_time, chain) + num_sim_blocks,
-    )
+    # Answered from the local block index once the start time has been seen.
+    start_block = time_to_block(start_time, chain)
+    block_range = (start_block, start_block + num_sim_blocks)
     # block_range = 21303933, 21354333
 
+    # Events are cached on disk, so reruns over the same blocks skip loading them.
     market_agent = HistoricReplayAgent(
-        chain=chain, pools=pools, block_range=block_range
+        chain=chain,
+        pools=pools,
+        block_range=block_range,
+        Dataloader=CachedUniswapV3Loader,
     )
 
     # Agents
-    trader_agent = TotalWealthAgent(
+    # Their balances are cached between their own actions.
+    trader_agent = CachedTotalWealthAgent(
         initial_portfolio={
             "ETH": Decimal(100),
             "USDC": Decimal(10_000),
@@ -53,7 +58,7 @@ def main(
         ),
     )
 
-    lp_agent = TotalWealthAgent(
+    lp_agent = CachedTotalWealthAgent(
         initial_portfolio={"USDC": Decimal(10_000), "WETH": Decimal(100)},
         name="LPAgent",
         unit_token="USDC",
@@ -61,7 +66,8 @@ def main(
     )
 
     # Simulation environment (Uniswap V3)
-    env = UniswapV3Env(
+    # Repeated observation queries within a block are answered from memory.
+    env = CachedUniswapV3Env(
         chain=chain,
         block_range=block_range,
         agents=[market_agent, trader_agent, lp_agent],
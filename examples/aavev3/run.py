@@ -1,17 +1,22 @@
 """Run a strategy on AAVE."""
+import sys
 from decimal import Decimal
+from pathlib import Path
 from typing import Any, Optional
 
-from policy import AAVEv3Policy
-
 from dojo.agents import AAVEv3Agent
-from dojo.common import time_to_block
 from dojo.common.constants import Chain
 from dojo.environments import AAVEv3Env
 from dojo.environments.aaveV3 import AAVEv3Observation
 from dojo.market_agents.aaveV3 import HistoricReplayAgent
 from dojo.runners import backtest_run
 
+# Examples run as scripts from their own directory, the shared helpers are in the
+# repository root.
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from common.block_index import time_to_block  # noqa: E402
+from policy import AAVEv3Policy  # noqa: E402
+
 
 class ConstantRewardAgent(AAVEv3Agent):
     """An agent that displays health factor as its reward."""
@@ -41,10 +46,8 @@ def main(
     """Running this strategy."""
     start_time = "2024-12-16 14:00:00"
     chain = Chain.ETHEREUM
-    block_range = (
-        time_to_block(start_time, chain),
-        time_to_block(start_time, chain) + num_sim_blocks,
-    )
+    start_block = time_to_block(start_time, chain)
+    block_range = (start_block, start_block + num_sim_blocks)
     # Agents
     market_agent = HistoricReplayAgent(chain=chain, block_range=block_range)
     agent1 = ConstantRewardAgent(
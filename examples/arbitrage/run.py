@@ -1,16 +1,21 @@
 """Run arbitrage strategy on Uniswap."""
+import sys
 from decimal import Decimal
+from pathlib import Path
 from typing import Any, Optional
 
-from policy import ArbitragePolicy
-
 from dojo.agents.uniswapV3 import TotalWealthAgent
-from dojo.common import time_to_block
 from dojo.common.constants import Chain
 from dojo.environments import UniswapV3Env
 from dojo.market_agents.uniswapV3 import HistoricReplayAgent
 from dojo.runners import backtest_run
 
+# Examples run as scripts from their own directory, the shared helpers are in the
+# repository root.
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from common.block_index import time_to_block  # noqa: E402
+from policy import ArbitragePolicy  # noqa: E402
+
 
 def main(
     *,
@@ -24,10 +29,8 @@ def main(
     pools = ["USDC/WETH-0.05", "USDC/WETH-0.3"]
     start_time = "2024-12-06 13:00:00"
     chain = Chain.ETHEREUM
-    block_range = (
-        time_to_block(start_time, chain),
-        time_to_block(start_time, chain) + num_sim_blocks,
-    )
+    start_block = time_to_block(start_time, chain)
+    block_range = (start_block, start_block + num_sim_blocks)
 
     # Agents
     market_agent = HistoricReplayAgent(
@@ -0,0 +1,391 @@
+"""Benchmarks for the custom dataloader on synthetic events.
+
+``range`` compares the block-indexed lookup with the previous approach of walking
+every block in the range. It does not need dojo, a license or network access.
+
+``memory`` compares the memory held by compact events with the memory held by the
+equivalent dojo event objects. It needs dojo to be installed.
+
+``loaders`` measures how fast loaders ingest and serve a synthetic export with one
+shard per pool: events per second for the first full load, peak RSS, and
+``_load_data`` latency across range widths and pool counts. Each loader runs in its
+own process and the results are printed as JSON. Besides the built-in loaders,
+``--loader module:function`` benchmarks any loader; the function is called with the
+export directory and returns the loader. It needs dojo to be installed.
+
+    python benchmark.py range
+    python benchmark.py memory
+    python benchmark.py loaders --events 200000 --pools 8 --output loaders.json
+"""
+import argparse
+import importlib
+import json
+import platform
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Any, Callable, Optional, Sequence
+
+import numpy as np
+
+from event_index import EventIndex
+from records import compact_from_row
+
+POOLS = [
+    "0x88e6a0c2ddd26feeb64f039a2c41296fcb3f5640",
+    "0x8ad599c3a0ff1de082011efddc58f1b5486e0b1e",
+]
+ACTIONS = ["Swap", "Swap", "Swap", "Mint", "Burn"]
+START_BLOCK = 15_000_000
+
+
+@dataclass
+class SyntheticEvent:
+    """Stand-in for a dojo UniswapV3Event with only the indexed fields."""
+
+    block: int
+    log_index: int
+    action: str
+    pool: str
+
+
+def synthetic_events(
+    n_events: int,
+    start_block: int,
+    n_blocks: int,
+    seed: int = 0,
+    pools: Sequence[str] = POOLS,
+) -> list[SyntheticEvent]:
+    """Generate events scattered randomly over a block range."""
+    rng = random.Random(seed)
+    return [
+        SyntheticEvent(
+            block=start_block + rng.randrange(n_blocks),
+            log_index=rng.randrange(500),
+            action=rng.choice(ACTIONS),
+            pool=rng.choice(pools),
+        )
+        for _ in range(n_events)
+    ]
+
+
+def _per_block_scan(
+    events: list[SyntheticEvent],
+) -> Callable[[int, int], list[SyntheticEvent]]:
+    by_block: defaultdict[int, list[SyntheticEvent]] = defaultdict(list)
+    for event in events:
+        by_block[event.block].append(event)
+
+    def query(from_block: int, to_block: int) -> list[SyntheticEvent]:
+        relevant: list[SyntheticEvent] = []
+        for block_number in range(from_block, to_block + 1):
+            relevant += list(
+                filter(lambda e: e.action in ACTIONS, by_block[block_number])
+            )
+        return relevant
+
+    return query
+
+
+def _time(fn: Callable[[], object], repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def range_benchmark(
+    n_events: int = 1_000_000, start_block: int = 15_000_000, n_blocks: int = 1_000_000
+) -> None:
+    """Print query latency for both approaches across range widths."""
+    events = synthetic_events(n_events, start_block, n_blocks)
+    index = EventIndex(events)
+    scan = _per_block_scan(events)
+
+    print(f"{n_events:,} events over {n_blocks:,} blocks")
+    print(f"{'width':>10} {'events':>10} {'scan [ms]':>12} {'index [ms]':>12}")
+    for width in [10, 100, 1_000, 10_000, 100_000, 1_000_000]:
+        to_block = start_block + width - 1
+        n_found = len(index.query(start_block, to_block))
+        scan_s = _time(lambda: scan(start_block, to_block), repeat=1)
+        index_s = _time(lambda: index.query(start_block, to_block))
+        print(
+            f"{width:>10,} {n_found:>10,} {scan_s * 1e3:>12.3f} {index_s * 1e3:>12.3f}"
+        )
+
+
+def synthetic_rows(
+    n_events: int, seed: int = 0, pools: Sequence[str] = POOLS
+) -> list[dict[str, object]]:
+    """Generate rows in the shape of the amberdata export."""
+    rng = random.Random(seed)
+    rows: list[dict[str, object]] = []
+    for event in synthetic_events(
+        n_events, START_BLOCK, max(n_events // 4, 1), seed, pools
+    ):
+        row: dict[str, object] = {
+            "blockNumber": str(event.block),
+            "logIndex": event.log_index,
+            "timestamp": 1656633835000 + event.block * 12_000,
+            "action": event.action,
+            "poolAddress": event.pool,
+            "amount0": str(rng.randrange(-(10**12), 10**12)),
+            "amount1": str(rng.randrange(-(10**20), 10**20)),
+        }
+        if event.action == "Swap":
+            row["tick"] = str(rng.randrange(190_000, 210_000))
+            row["sender"] = "0xe592427a0aece92de3edee1f18e0157c05861564"
+            row["recipient"] = "0xe592427a0aece92de3edee1f18e0157c05861564"
+        else:
+            row["owner"] = "0xc36442b4a4522e871399cd717abdd847ab11fe88"
+            row["tickLower"] = str(rng.randrange(190_000, 200_000))
+            row["tickUpper"] = str(rng.randrange(200_000, 210_000))
+        rows.append(row)
+    # Round trip through JSON so that every row holds its own copy of each string,
+    # as it does when parsed from a real export.
+    return json.loads(json.dumps(rows))  # type: ignore[no-any-return]
+
+
+def _held_bytes(build: Callable[[], list[object]]) -> tuple[int, list[object]]:
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    objects = build()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    held = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    return held, objects
+
+
+def memory_benchmark(n_events: int = 200_000) -> None:
+    """Print the memory held by compact events and by dojo events."""
+    from custom_loader import event_from_record, event_from_row
+
+    rows = synthetic_rows(n_events)
+    compact_bytes, records = _held_bytes(
+        lambda: [compact_from_row(row) for row in rows]
+    )
+    dojo_bytes, _ = _held_bytes(lambda: [event_from_row(row) for row in rows])
+    lazy_s = _time(
+        lambda: [event_from_record(r) for r in records[:10_000]]  # type: ignore
+    )
+
+    print(f"{n_events:,} events")
+    print(f"{'representation':>16} {'total [MB]':>12} {'per event [B]':>14}")
+    for name, held in [("dojo formats", dojo_bytes), ("CompactEvent", compact_bytes)]:
+        print(f"{name:>16} {held / 1e6:>12.1f} {held / n_events:>14.0f}")
+    print(f"materialising on consumption: {lazy_s / 10_000 * 1e6:.2f} us per event")
+
+
+def write_synthetic_export(
+    directory: Path, n_events: int, n_pools: int, seed: int = 0
+) -> list[str]:
+    """Write a synthetic export with one block-sorted shard per pool.
+
+    :return: The pool addresses.
+    """
+    pools = [f"0x{i + 1:040x}" for i in range(n_pools)]
+    rows = synthetic_rows(n_events, seed, pools)
+    rows.sort(key=lambda r: (int(r["blockNumber"]), r["logIndex"]))  # type: ignore
+    for i, pool in enumerate(pools):
+        with open(directory / f"pool-{i:03d}.json", "w") as f:
+            json.dump([row for row in rows if row["poolAddress"] == pool], f)
+    return pools
+
+
+def custom_cold_cache(data_dir: Path) -> Any:
+    """CustomDataLoader compiling its columnar cache from scratch."""
+    from columnar_cache import default_cache_dir
+    from custom_loader import CustomDataLoader
+
+    shutil.rmtree(default_cache_dir(data_dir), ignore_errors=True)
+    return CustomDataLoader(data_dir)
+
+
+def custom_warm_cache(data_dir: Path) -> Any:
+    """CustomDataLoader memory-mapping the cache of ``custom-cold-cache``."""
+    from custom_loader import CustomDataLoader
+
+    return CustomDataLoader(data_dir)
+
+
+def custom_in_memory(data_dir: Path) -> Any:
+    """CustomDataLoader parsing the export into memory."""
+    from custom_loader import CustomDataLoader
+
+    return CustomDataLoader(data_dir, use_cache=False)
+
+
+def streaming(data_dir: Path) -> Any:
+    """StreamingCustomDataLoader over block-sorted shards."""
+    from custom_loader import StreamingCustomDataLoader
+
+    return StreamingCustomDataLoader(data_dir, presorted=True)
+
+
+BUILTIN_LOADERS: dict[str, Callable[[Path], Any]] = {
+    "custom-cold-cache": custom_cold_cache,
+    "custom-warm-cache": custom_warm_cache,
+    "custom-in-memory": custom_in_memory,
+    "streaming": streaming,
+}
+
+
+def _resolve_loader(spec: str) -> Callable[[Path], Any]:
+    if spec in BUILTIN_LOADERS:
+        return BUILTIN_LOADERS[spec]
+    module, _, attr = spec.partition(":")
+    return getattr(importlib.import_module(module), attr)  # type: ignore
+
+
+def _peak_rss_bytes() -> int:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _time_load(load: Callable[[], list[Any]], budget_s: float = 1.0) -> float:
+    """Best of up to three runs, stopping early once a run exceeds the budget."""
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        load()
+        elapsed = time.perf_counter() - start
+        best = min(best, elapsed)
+        if elapsed > budget_s:
+            break
+    return best
+
+
+def _measure_loader(
+    spec: str,
+    data_dir: Path,
+    pools: list[str],
+    widths: list[int],
+    pool_counts: list[int],
+) -> dict[str, Any]:
+    """Benchmark one loader. Runs in a fresh worker process."""
+    from dojo.common.constants import Chain
+
+    baseline_rss = _peak_rss_bytes()
+    n_blocks = max(widths)
+    to_block = START_BLOCK + n_blocks - 1
+
+    start = time.perf_counter()
+    loader = _resolve_loader(spec)(data_dir)
+    n_events = len(loader._load_data(Chain.ETHEREUM, pools, START_BLOCK, to_block))
+    ingest_s = time.perf_counter() - start
+
+    latencies = []
+    for n_pools in pool_counts:
+        for width in widths:
+            last_block = START_BLOCK + width - 1
+            query = (Chain.ETHEREUM, pools[:n_pools], START_BLOCK, last_block)
+            n_found = len(loader._load_data(*query))
+            latencies.append(
+                {
+                    "pools": n_pools,
+                    "width": width,
+                    "events": n_found,
+                    "seconds": _time_load(lambda: loader._load_data(*query)),
+                }
+            )
+
+    return {
+        "loader": spec,
+        "events": n_events,
+        "ingest_seconds": ingest_s,
+        "events_per_second": n_events / ingest_s if ingest_s > 0 else None,
+        "baseline_rss_bytes": baseline_rss,
+        "peak_rss_bytes": _peak_rss_bytes(),
+        "load_data": latencies,
+    }
+
+
+def loaders_benchmark(
+    loaders: Sequence[str],
+    n_events: int = 200_000,
+    n_pools: int = 8,
+    output: Optional[Path] = None,
+) -> dict[str, Any]:
+    """Benchmark loaders on a synthetic export and report the results as JSON.
+
+    :param loaders: Names of built-in loaders or ``module:function`` specs.
+    :param n_events: Number of events in the synthetic export.
+    :param n_pools: Number of pools, each written to its own shard.
+    :param output: Also write the report to this file.
+    """
+    n_blocks = max(n_events // 4, 1)
+    widths = sorted({min(w, n_blocks) for w in (100, 1_000, 10_000, n_blocks)})
+    pool_counts = sorted({1, max(n_pools // 2, 1), n_pools})
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = Path(tmp)
+        pools = write_synthetic_export(data_dir, n_events, n_pools)
+        results = []
+        for spec in loaders:
+            # A fresh process per loader keeps peak RSS from leaking across loaders.
+            with ProcessPoolExecutor(1, mp_context=get_context("spawn")) as pool:
+                results.append(
+                    pool.submit(
+                        _measure_loader, spec, data_dir, pools, widths, pool_counts
+                    ).result()
+                )
+
+    report = {
+        "benchmark": "loaders",
+        "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "events": n_events,
+        "pools": n_pools,
+        "blocks": n_blocks,
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if output is not None:
+        output.write_text(text + "\n")
+    print(text)
+    return report
+
+
+def main() -> None:
+    """Run the benchmark selected on the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("benchmark", choices=["range", "memory", "loaders"], nargs="?")
+    parser.add_argument(
+        "--loader",
+        action="append",
+        help="Loader to benchmark, a built-in name or module:function. "
+        f"Defaults to all of {', '.join(BUILTIN_LOADERS)}.",
+    )
+    parser.add_argument("--events", type=int, default=200_000)
+    parser.add_argument("--pools", type=int, default=8)
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args()
+    if args.benchmark in (None, "range"):
+        range_benchmark()
+    if args.benchmark in (None, "memory"):
+        memory_benchmark()
+    if args.benchmark in (None, "loaders"):
+        loaders_benchmark(
+            args.loader or list(BUILTIN_LOADERS),
+            n_events=args.events,
+            n_pools=args.pools,
+            output=args.output,
+        )
+
+
+if __name__ == "__main__":
+    main()
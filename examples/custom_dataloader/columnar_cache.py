@@ -0,0 +1,376 @@
+"""On-disk columnar cache of a Uniswap V3 event export.
+
+Compiling parses the export once and writes one ``.npy`` file per column, sorted by
+(block, log_index). Opening the cache memory-maps those files, so later runs on the
+same data skip parsing altogether. The cache is rebuilt whenever the size or
+modification time of one of the source files changes.
+
+Column files are never written in place, since other loaders may have them
+memory-mapped. Every build goes into a new directory inside the cache directory and
+``meta.json``, which names the current build, is then replaced atomically. Readers
+see either the old or the new build, never a mix. Rebuilds hold a lock on the cache
+directory, so concurrent loaders compile a stale cache once.
+"""
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Iterable, Optional, Sequence, Union
+
+import numpy as np
+from filters import EventFilter
+from records import CompactEvent
+from streaming import iter_json_array
+
+CACHE_FORMAT_VERSION = 3
+
+ACTIONS = ("Swap", "Mint", "Burn")
+_ACTION_CODES = {action: code for code, action in enumerate(ACTIONS)}
+
+_INT128_MIN, _INT128_MAX = -(2**127), 2**127 - 1
+_LOW_MASK = 2**64 - 1
+
+# Amounts can exceed int64 (e.g. 18 decimal tokens), so each one is stored as a
+# signed high and an unsigned low 64 bit word. Addresses are ids into the string
+# table, -1 where the event type has none.
+_COLUMNS = {
+    "block": np.int64,
+    "log_index": np.int32,
+    "timestamp": np.int64,
+    "action": np.uint8,
+    "pool": np.int32,
+    "owner": np.int32,
+    "amount0_hi": np.int64,
+    "amount0_lo": np.uint64,
+    "amount1_hi": np.int64,
+    "amount1_lo": np.uint64,
+    "tick_lower": np.int32,
+    "tick_upper": np.int32,
+    "tick": np.int32,
+    "sender": np.int32,
+    "recipient": np.int32,
+}
+
+_ADDRESS_COLUMNS = ("owner", "sender", "recipient")
+
+
+def default_cache_dir(source: Union[Path, str]) -> Path:
+    """Directory the cache of ``source`` is written to unless told otherwise.
+
+    :param source: An export file, a directory of shards or a glob pattern.
+    """
+    path = Path(source)
+    if path.is_dir():
+        return path / ".columns"
+    if path.exists():
+        return path.with_name(path.stem + ".columns")
+    digest = hashlib.sha1(str(source).encode()).hexdigest()[:8]
+    return path.parent / f"shards-{digest}.columns"
+
+
+def _source_fingerprint(sources: Sequence[Path]) -> dict[str, Any]:
+    stats = [(source, os.stat(source)) for source in sources]
+    return {
+        "version": CACHE_FORMAT_VERSION,
+        "sources": [
+            [str(source.resolve()), stat.st_size, stat.st_mtime_ns]
+            for source, stat in stats
+        ],
+    }
+
+
+def _split_amount(amount: int) -> tuple[int, int]:
+    if not _INT128_MIN <= amount <= _INT128_MAX:
+        raise ValueError(f"Amount {amount} does not fit into 128 bits.")
+    return amount >> 64, amount & _LOW_MASK
+
+
+def _join_amount(hi: np.int64, lo: np.uint64) -> int:
+    return (int(hi) << 64) + int(lo)
+
+
+def _abs_at_least(hi: np.ndarray, lo: np.ndarray, threshold: int) -> np.ndarray:
+    """Vectorised ``abs(amount) >= threshold`` over split 128 bit amounts."""
+    if threshold <= 0:
+        return np.ones(len(hi), dtype=bool)
+    if threshold >= 2**64:
+        return np.array(
+            [abs(_join_amount(h, l)) >= threshold for h, l in zip(hi, lo)], dtype=bool
+        )
+    # |amount| >= 2**64 unless hi is 0 (amount == lo) or -1 (amount == lo - 2**64).
+    magnitude = np.where(hi == -1, np.uint64(0) - lo, lo)
+    return (hi > 0) | (hi < -1) | ((hi == -1) & (lo == 0)) | (magnitude >= threshold)
+
+
+class ColumnarEvents:
+    """Memory-mapped columns of a compiled event export.
+
+    :param cache_dir: A build directory written by :func:`compile_columns`.
+    """
+
+    def __init__(self, cache_dir: Path) -> None:  # noqa: D107
+        self.columns = {
+            name: np.load(cache_dir / f"{name}.npy", mmap_mode="r")
+            for name in _COLUMNS
+        }
+        self.blocks = np.load(cache_dir / "index_blocks.npy", mmap_mode="r")
+        self.offsets = np.load(cache_dir / "index_offsets.npy", mmap_mode="r")
+        with open(cache_dir / "strings.json", "r") as f:
+            self.strings: list[str] = json.load(f)
+        self._string_ids = {string: i for i, string in enumerate(self.strings)}
+
+    def __len__(self) -> int:  # noqa: D105
+        return len(self.columns["block"])
+
+    def span(self, from_block: int, to_block: int) -> tuple[int, int]:
+        """Row positions covering all blocks in [from_block, to_block]."""
+        lo = int(np.searchsorted(self.blocks, from_block, side="left"))
+        hi = int(np.searchsorted(self.blocks, to_block, side="right"))
+        return int(self.offsets[lo]), int(self.offsets[hi])
+
+    def select(
+        self,
+        from_block: int,
+        to_block: int,
+        pools: Optional[Sequence[str]] = None,
+        actions: Optional[Sequence[str]] = None,
+        event_filter: Optional[EventFilter] = None,
+    ) -> np.ndarray:
+        """Return the row numbers matching a query, in chain order.
+
+        :param from_block: First block of the range, inclusive.
+        :param to_block: Last block of the range, inclusive.
+        :param pools: Only select rows on these pool addresses. All pools if empty.
+        :param actions: Only select these event types. All event types if empty.
+        :param event_filter: Further criteria, evaluated on the columns.
+        """
+        start, stop = self.span(from_block, to_block)
+        rows = np.arange(start, stop)
+        if pools:
+            pool_ids = [
+                self._string_ids[pool.lower()]
+                for pool in pools
+                if pool.lower() in self._string_ids
+            ]
+            rows = rows[np.isin(self.columns["pool"][start:stop], pool_ids)]
+        if actions:
+            action_codes = [_ACTION_CODES[a] for a in actions if a in _ACTION_CODES]
+            rows = rows[np.isin(self.columns["action"][rows], action_codes)]
+        if event_filter is not None:
+            rows = rows[self._filter_mask(rows, event_filter)]
+        return rows
+
+    def _filter_mask(self, rows: np.ndarray, event_filter: EventFilter) -> np.ndarray:
+        c = self.columns
+        is_swap = c["action"][rows] == _ACTION_CODES["Swap"]
+        swap_ok = _abs_at_least(
+            c["amount0_hi"][rows], c["amount0_lo"][rows], event_filter.min_abs_amount0
+        ) & _abs_at_least(
+            c["amount1_hi"][rows], c["amount1_lo"][rows], event_filter.min_abs_amount1
+        )
+
+        mask = np.where(is_swap, swap_ok, True)
+        if event_filter.tick_window is not None:
+            lower, upper = event_filter.tick_window
+            tick = c["tick"][rows]
+            tick_lower = np.where(is_swap, tick, c["tick_lower"][rows])
+            tick_upper = np.where(is_swap, tick, c["tick_upper"][rows])
+            mask &= (tick_upper >= lower) & (tick_lower <= upper)
+        if event_filter.owners:
+            mask &= self._has_address(rows, self._owner_ids(event_filter.owners))
+        if event_filter.exclude_owners:
+            excluded = self._owner_ids(event_filter.exclude_owners)
+            mask &= ~self._has_address(rows, excluded)
+        return mask
+
+    def _has_address(self, rows: np.ndarray, ids: list[int]) -> np.ndarray:
+        """Whether the owner, sender or recipient of each row is one of ``ids``."""
+        found = np.zeros(len(rows), dtype=bool)
+        for name in _ADDRESS_COLUMNS:
+            found |= np.isin(self.columns[name][rows], ids)
+        return found
+
+    def _owner_ids(self, owners: Iterable[str]) -> list[int]:
+        wanted = set(owners)
+        return [i for i, string in enumerate(self.strings) if string.lower() in wanted]
+
+    def record(self, i: int) -> CompactEvent:
+        """Rebuild row ``i`` as a compact event."""
+        c = self.columns
+        owner, sender, recipient = (int(c[name][i]) for name in _ADDRESS_COLUMNS)
+        return CompactEvent(
+            block=int(c["block"][i]),
+            log_index=int(c["log_index"][i]),
+            timestamp=int(c["timestamp"][i]),
+            action=ACTIONS[c["action"][i]],
+            pool=self.strings[c["pool"][i]],
+            amount0=_join_amount(c["amount0_hi"][i], c["amount0_lo"][i]),
+            amount1=_join_amount(c["amount1_hi"][i], c["amount1_lo"][i]),
+            owner=self.strings[owner] if owner >= 0 else None,
+            tick_lower=int(c["tick_lower"][i]),
+            tick_upper=int(c["tick_upper"][i]),
+            tick=int(c["tick"][i]),
+            sender=self.strings[sender] if sender >= 0 else None,
+            recipient=self.strings[recipient] if recipient >= 0 else None,
+        )
+
+
+_Columns = dict[str, np.ndarray]
+
+
+def parse_columns(rows: Iterable[dict[str, Any]]) -> tuple[_Columns, list[str]]:
+    """Turn decoded export rows into unsorted columns and their string table.
+
+    :param rows: The decoded rows of an export, e.g. from ``iter_json_array``.
+    :raises ValueError: When a row has an unknown event type.
+    """
+    values: dict[str, list[int]] = {name: [] for name in _COLUMNS}
+    string_ids: dict[str, int] = {}
+
+    def intern(string: str) -> int:
+        return string_ids.setdefault(string, len(string_ids))
+
+    for row in rows:
+        action = row["action"]
+        if action in ("Collect", "Initialize"):
+            continue
+        if action not in _ACTION_CODES:
+            raise ValueError(f"Unknown event type: {action}")
+        amount0_hi, amount0_lo = _split_amount(int(row["amount0"]))
+        amount1_hi, amount1_lo = _split_amount(int(row["amount1"]))
+        is_swap = action == "Swap"
+        for name, value in (
+            ("block", int(row["blockNumber"])),
+            ("log_index", int(row["logIndex"])),
+            ("timestamp", int(row["timestamp"])),
+            ("action", _ACTION_CODES[action]),
+            ("pool", intern(row["poolAddress"].lower())),
+            ("owner", -1 if is_swap else intern(row["owner"])),
+            ("amount0_hi", amount0_hi),
+            ("amount0_lo", amount0_lo),
+            ("amount1_hi", amount1_hi),
+            ("amount1_lo", amount1_lo),
+            ("tick_lower", 0 if is_swap else int(row["tickLower"])),
+            ("tick_upper", 0 if is_swap else int(row["tickUpper"])),
+            ("tick", int(row["tick"]) if is_swap else 0),
+            ("sender", intern(row["sender"]) if is_swap else -1),
+            ("recipient", intern(row["recipient"]) if is_swap else -1),
+        ):
+            values[name].append(value)
+
+    columns = {
+        name: np.array(values[name], dtype=dtype) for name, dtype in _COLUMNS.items()
+    }
+    return columns, list(string_ids)
+
+
+def parse_shard(path: Path) -> tuple[_Columns, list[str]]:
+    """Parse one export file into columns. Runs in a worker process."""
+    return parse_columns(iter_json_array(path))
+
+
+def _merge_shards(
+    shards: Sequence[tuple[_Columns, list[str]]]
+) -> tuple[_Columns, list[str]]:
+    """Concatenate shards, mapping their string ids onto one shared table."""
+    string_ids: dict[str, int] = {}
+    parts: list[_Columns] = []
+    for columns, strings in shards:
+        remap = np.array(
+            [string_ids.setdefault(s, len(string_ids)) for s in strings] + [-1],
+            dtype=np.int32,
+        )
+        # Index -1 (no address) picks the trailing -1 of remap.
+        remapped = {name: remap[columns[name]] for name in ("pool", *_ADDRESS_COLUMNS)}
+        parts.append({**columns, **remapped})
+    merged = {
+        name: np.concatenate([part[name] for part in parts]).astype(dtype)
+        for name, dtype in _COLUMNS.items()
+    }
+    return merged, list(string_ids)
+
+
+def _read_meta(cache_dir: Path) -> Optional[dict[str, Any]]:
+    try:
+        with open(cache_dir / "meta.json", "r") as f:
+            return json.load(f)  # type: ignore[no-any-return]
+    except FileNotFoundError:
+        return None
+
+
+def compile_columns(
+    sources: Sequence[Path], cache_dir: Path, max_workers: Optional[int] = None
+) -> None:
+    """Write the columnar cache of one or more export files.
+
+    With several sources, each one is parsed in its own worker process and the
+    results are merged into a single cache ordered by (block, log_index).
+
+    :param sources: The export files to compile. Their fingerprints are stored so
+        that the cache can be invalidated when one of them changes.
+    :param cache_dir: Directory to write the cache to.
+    :param max_workers: Number of worker processes. Defaults to the number of CPUs.
+    :raises ValueError: When a row has an unknown event type.
+    """
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    with open(cache_dir / "build.lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        meta = _read_meta(cache_dir)
+        if meta is None or meta.get("fingerprint") != _source_fingerprint(sources):
+            _build(sources, cache_dir, max_workers)
+
+
+def _build(
+    sources: Sequence[Path], cache_dir: Path, max_workers: Optional[int]
+) -> None:
+    if len(sources) == 1 or max_workers == 1:
+        shards = [parse_shard(source) for source in sources]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            shards = list(pool.map(parse_shard, sources))
+    columns, strings = _merge_shards(shards)
+
+    order = np.lexsort((columns["log_index"], columns["block"]))
+    blocks, first_offsets = np.unique(columns["block"][order], return_index=True)
+
+    build_dir = Path(tempfile.mkdtemp(prefix="build-", dir=cache_dir))
+    try:
+        for name, column in columns.items():
+            np.save(build_dir / f"{name}.npy", column[order])
+        np.save(build_dir / "index_blocks.npy", blocks)
+        np.save(build_dir / "index_offsets.npy", np.append(first_offsets, len(order)))
+        with open(build_dir / "strings.json", "w") as f:
+            json.dump(strings, f)
+        meta = {"fingerprint": _source_fingerprint(sources), "build": build_dir.name}
+        tmp_path = build_dir / "meta.json"
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, cache_dir / "meta.json")
+    except BaseException:
+        shutil.rmtree(build_dir, ignore_errors=True)
+        raise
+    # Readers that mapped a replaced build keep their open files.
+    for old_build in cache_dir.glob("build-*"):
+        if old_build != build_dir:
+            shutil.rmtree(old_build, ignore_errors=True)
+
+
+def open_columns(
+    sources: Sequence[Path], cache_dir: Path
+) -> Optional[ColumnarEvents]:
+    """Memory-map the cache of ``sources``, or return None if missing or stale."""
+    fingerprint = _source_fingerprint(sources)
+    for _ in range(3):
+        meta = _read_meta(cache_dir)
+        if meta is None or meta.get("fingerprint") != fingerprint:
+            return None
+        try:
+            return ColumnarEvents(cache_dir / meta["build"])
+        except FileNotFoundError:
+            # A concurrent rebuild replaced the build, look up the new one.
+            continue
+    return None
@@ -1,10 +1,26 @@
 """Implementation of a custom dataloader."""
-import json
-from collections import defaultdict
+import glob
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import groupby
+from operator import attrgetter
 from pathlib import Path
-from typing import DefaultDict, Literal, Optional
+from typing import Any, Iterator, Literal, Optional, Union
+
+from columnar_cache import (
+    ColumnarEvents,
+    compile_columns,
+    default_cache_dir,
+    open_columns,
+)
+from event_index import EventIndex
+from filters import EventFilter
+from records import CompactEvent, compact_from_row, read_records
+from streaming import iter_json_array, merge_events
 
 from dojo.common.constants import Chain
+from dojo.config import deployments as deploy_cfg
 from dojo.dataloaders.base_uniswapV3_loader import BaseUniswapV3Loader
 from dojo.dataloaders.formats import (  # UniswapV3Collect,; UniswapV3Initialize,
     UniswapV3Burn,
@@ -13,91 +29,328 @@ from dojo.dataloaders.formats import (  # UniswapV3Collect,; UniswapV3Initialize
     UniswapV3Swap,
 )
 
+DEFAULT_DATA_PATH = Path(__file__).resolve().parent / "amberdata.json"
+
+
+def shard_paths(source: Union[Path, str]) -> list[Path]:
+    """Resolve an export file, a directory of JSON shards or a glob pattern.
+
+    :param source: The export(s) to load.
+    :raises ValueError: When no files match.
+    """
+    path = Path(source)
+    if path.is_dir():
+        paths = sorted(path.glob("*.json"))
+    elif path.exists():
+        paths = [path]
+    else:
+        paths = sorted(Path(p) for p in glob.glob(str(source)))
+    if not paths:
+        raise ValueError(f"No event exports found at {source}")
+    return paths
+
+
+@lru_cache(maxsize=None)
+def pool_address(chain: Chain, pool: str) -> str:
+    """Lower case address of a pool given by address or by name.
+
+    dojo passes the pool names of the environment, e.g. ``"USDC/WETH-0.05"``, while
+    the export identifies pools by address. Names are looked up in dojo's
+    deployments of ``chain``.
+
+    :param chain: The chain the pool is on.
+    :param pool: A pool address or name.
+    """
+    if pool.startswith("0x"):
+        return pool.lower()
+    return deploy_cfg.get_address(chain, "UniswapV3", pool).lower()
+
+
+def event_from_record(record: CompactEvent) -> UniswapV3Event:
+    """Build the dojo event that the market agent replays from a compact event."""
+    match record.action:
+        case "Mint":
+            return UniswapV3Mint(
+                quantities=[record.amount0, record.amount1],
+                tick_range=[record.tick_lower, record.tick_upper],
+                liquidity=0,
+                owner=record.owner,  # type: ignore[arg-type]
+                date=record.timestamp,  # type: ignore[arg-type]
+                block=record.block,
+                log_index=record.log_index,
+                action=record.action,
+                pool=record.pool,
+                gas=0,
+                gas_price=0,
+            )
+        case "Burn":
+            return UniswapV3Burn(
+                quantities=[record.amount0, record.amount1],
+                tick_range=[record.tick_lower, record.tick_upper],
+                liquidity=0,
+                owner=record.owner,  # type: ignore[arg-type]
+                date=record.timestamp,  # type: ignore[arg-type]
+                block=record.block,
+                log_index=record.log_index,
+                action=record.action,
+                pool=record.pool,
+                gas=0,
+                gas_price=0,
+            )
+        case "Swap":
+            return UniswapV3Swap(
+                quantities=[record.amount0, record.amount1],
+                sqrt_price_limit_x96=2**256 - 1,
+                date=record.timestamp,  # type: ignore[arg-type]
+                block=record.block,
+                log_index=record.log_index,
+                action=record.action,
+                pool=record.pool,
+                gas=0,
+                gas_price=0,
+            )
+        case _:
+            raise ValueError(f"Unknown event type: {record.action}")
+
+
+def event_from_row(event: dict[str, Any]) -> Optional[UniswapV3Event]:
+    """Convert one row of the amberdata export into a dojo event.
+
+    :param event: A single decoded JSON object from the export.
+    :raises ValueError: When the event type is unknown.
+    """
+    record = compact_from_row(event)
+    return event_from_record(record) if record is not None else None
+
+
+def _query_actions(
+    subset: Optional[list[str]], event_filter: Optional[EventFilter]
+) -> Optional[list[str]]:
+    """Event types to query; an empty list means that none can match."""
+    if event_filter is None:
+        return subset
+    return event_filter.combined_actions(subset)
+
 
 class CustomDataLoader(BaseUniswapV3Loader):
     """Load historic data yourself."""
 
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        path: Union[Path, str] = DEFAULT_DATA_PATH,
+        use_cache: bool = True,
+        cache_dir: Optional[Path] = None,
+        max_workers: Optional[int] = None,
+        event_filter: Optional[EventFilter] = None,
+    ) -> None:
         """Set up your custom dataloader here.
 
+        The first run compiles the export into a columnar cache on disk, sorted by
+        (block, log_index) with a sorted block array on top. Later runs memory-map
+        that cache instead of parsing the export again, and `_load_data` is a binary
+        search plus a slice instead of a walk over every block in the range. Events
+        are held as compact records and only turned into dojo events by `_load_data`.
+
+        :param path: The JSON export to load, a directory of JSON shards or a glob
+            pattern such as ``"exports/*-2024-*.json"``. Shards are parsed in
+            parallel. Defaults to the bundled sample.
+        :param use_cache: Set to False to parse the export into memory on every run.
+        :param cache_dir: Where to keep the cache. Defaults to a ``.columns``
+            directory next to the export.
+        :param max_workers: Number of processes used to parse shards. Defaults to the
+            number of CPUs.
+        :param event_filter: Only replay the events that pass this filter. It is
+            applied to the compact records or the cached columns, so dropped events
+            are never built.
         :raises ValueError: When the data cannot be loaded.
         """
-        self.events: DefaultDict[int, list[UniswapV3Event]] = defaultdict(list)
-
-        # Get the absolute path to the current file's directory
-        current_dir = Path(__file__).resolve().parent
-
-        # Construct the path to the JSON file
-        json_path = current_dir / "amberdata.json"
-
-        with open(json_path, "r") as f:
-            for event in json.load(f):
-                block = event["blockNumber"]
-                match event["action"]:
-                    case "Mint":
-                        self.events[block].append(
-                            UniswapV3Mint(
-                                quantities=[event["amount0"], event["amount1"]],
-                                tick_range=[event["tickLower"], event["tickUpper"]],
-                                liquidity=0,
-                                owner=event["owner"],
-                                date=event["timestamp"],
-                                block=event["blockNumber"],
-                                log_index=event["logIndex"],
-                                action=event["action"],
-                                pool=event["poolAddress"].lower(),
-                                gas=0,
-                                gas_price=0,
-                            )
-                        )
-                    case "Burn":
-                        self.events[block].append(
-                            UniswapV3Burn(
-                                quantities=[event["amount0"], event["amount1"]],
-                                tick_range=[event["tickLower"], event["tickUpper"]],
-                                liquidity=0,
-                                owner=event["owner"],
-                                date=event["timestamp"],
-                                block=event["blockNumber"],
-                                log_index=event["logIndex"],
-                                action=event["action"],
-                                pool=event["poolAddress"].lower(),
-                                gas=0,
-                                gas_price=0,
-                            )
-                        )
-                    case "Swap":
-                        self.events[block].append(
-                            UniswapV3Swap(
-                                quantities=[event["amount0"], event["amount1"]],
-                                sqrt_price_limit_x96=2**256 - 1,
-                                date=event["timestamp"],
-                                block=event["blockNumber"],
-                                log_index=event["logIndex"],
-                                action=event["action"],
-                                pool=event["poolAddress"].lower(),
-                                gas=0,
-                                gas_price=0,
-                            )
-                        )
-                    case "Collect":
-                        # TODO needs to be implemented
-                        pass
-                    case "Initialize":
-                        # TODO needs to be implemented
-                        pass
-                    case _:
-                        raise ValueError(f"Unknown event type: {event['action']}")
+        sources = shard_paths(path)
+        self.event_filter = event_filter
+        self.columns: Optional[ColumnarEvents] = None
+        if use_cache:
+            cache_dir = cache_dir or default_cache_dir(path)
+            self.columns = open_columns(sources, cache_dir)
+            if self.columns is None:
+                compile_columns(sources, cache_dir, max_workers=max_workers)
+                self.columns = open_columns(sources, cache_dir)
+            return
+
+        if len(sources) == 1 or max_workers == 1:
+            shards = [read_records(source) for source in sources]
+        else:
+            with ProcessPoolExecutor(max_workers=max_workers) as pool:
+                shards = list(pool.map(read_records, sources))
+        self.index: EventIndex[CompactEvent] = EventIndex(
+            record for shard in shards for record in shard
+        )
 
     def _load_data(self, chain: Chain, pool_addresses: list[str], from_block: int, to_block: int, subset: Optional[list[Literal["Burn", "Mint", "Swap"]]] = None) -> list[UniswapV3Event]:  # type: ignore[override]
-        relevant_events: list[UniswapV3Event] = []
-        for block_number in range(from_block, to_block + 1):
-            # if subset:
-            #     pass
-            relevant_events += list(
-                filter(
-                    lambda event: event["action"] in subset, self.events[block_number]  # type: ignore
-                )
+        actions = _query_actions(subset, self.event_filter)
+        if actions == []:
+            return []
+        pool_addresses = [pool_address(chain, pool) for pool in pool_addresses]
+        if self.columns is None:
+            records = self.index.query(
+                from_block, to_block, pools=pool_addresses, actions=actions
+            )
+            if self.event_filter is not None:
+                records = [r for r in records if self.event_filter.matches(r)]
+        else:
+            rows = self.columns.select(
+                from_block,
+                to_block,
+                pools=pool_addresses,
+                actions=actions,
+                event_filter=self.event_filter,
             )
+            records = [self.columns.record(i) for i in rows]
+        return [event_from_record(record) for record in records]
 
-        return relevant_events
+
+class StreamingCustomDataLoader(CustomDataLoader):
+    """Parse the export incrementally instead of loading it all up front.
+
+    Rows are read one at a time, filtered on their raw fields and only turned into
+    dojo events when they match the query, so memory grows with the matching events
+    rather than with the size of the file. ``_load_data`` returns the whole range as
+    a list, like every dojo loader. ``stream`` yields the same events one at a time,
+    and ``pagination.PaginatedReplayAgent`` replays that stream block by block.
+
+    With several presorted shards, e.g. one export per pool and month, the shards of
+    each pool are read one after the other and the pools are merged on the fly into
+    a single stream in (block, log_index) order. Only one pending event and one read
+    buffer per pool are held at a time.
+    """
+
+    def __init__(
+        self,
+        path: Union[Path, str] = DEFAULT_DATA_PATH,
+        presorted: bool = False,
+        event_filter: Optional[EventFilter] = None,
+    ) -> None:
+        """Remember where the export lives; nothing is parsed yet.
+
+        :param path: The JSON export to stream, a directory of JSON shards or a glob
+            pattern. Defaults to the bundled sample.
+        :param presorted: Set this if every shard is sorted by block. Events are then
+            yielded while the files are still being parsed and a query stops reading
+            a shard as soon as it has passed ``to_block``. Otherwise each shard is
+            scanned in full and its matching events are sorted before they are
+            yielded.
+        :param event_filter: Only replay the rows that pass this filter. Rows that
+            fail it are never built into dojo events.
+        """
+        self.sources = shard_paths(path)
+        self.presorted = presorted
+        self.event_filter = event_filter
+        self._pool_shards: Optional[dict[str, list[Path]]] = None
+
+    def pool_shards(self) -> dict[str, list[Path]]:
+        """Group presorted shards by pool, each pool's shards in block order.
+
+        Only the first event of every shard is read to do this.
+        """
+        if self._pool_shards is None:
+            first_rows = {
+                shard: next(iter_json_array(shard), None) for shard in self.sources
+            }
+            pool_shards: dict[str, list[Path]] = {}
+            for shard, row in sorted(
+                ((s, r) for s, r in first_rows.items() if r is not None),
+                key=lambda item: int(item[1]["blockNumber"]),
+            ):
+                pool_shards.setdefault(row["poolAddress"].lower(), []).append(shard)
+            self._pool_shards = pool_shards
+        return self._pool_shards
+
+    def _iter_shard(
+        self,
+        shard: Path,
+        from_block: int,
+        to_block: int,
+        pool_set: Optional[set[str]],
+        actions: Optional[list[str]],
+    ) -> Iterator[UniswapV3Event]:
+        def matching_events() -> Iterator[UniswapV3Event]:
+            for row in iter_json_array(shard):
+                block = int(row["blockNumber"])
+                if block < from_block:
+                    continue
+                if block > to_block:
+                    if self.presorted:
+                        return
+                    continue
+                if pool_set and row["poolAddress"].lower() not in pool_set:
+                    continue
+                if actions and row["action"] not in actions:
+                    continue
+                record = compact_from_row(row)
+                if record is None:
+                    continue
+                if self.event_filter is None or self.event_filter.matches(record):
+                    yield event_from_record(record)
+
+        if not self.presorted:
+            yield from sorted(matching_events(), key=attrgetter("block", "log_index"))
+            return
+        for _, block_events in groupby(matching_events(), key=attrgetter("block")):
+            yield from sorted(block_events, key=attrgetter("log_index"))
+
+    def iter_events(
+        self,
+        from_block: int,
+        to_block: int,
+        pools: Optional[list[str]] = None,
+        actions: Optional[list[str]] = None,
+    ) -> Iterator[UniswapV3Event]:
+        """Yield matching events in (block, log_index) order while parsing.
+
+        :param from_block: First block of the range, inclusive.
+        :param to_block: Last block of the range, inclusive.
+        :param pools: Only yield events on these pool addresses. All pools if empty.
+        :param actions: Only yield these event types. All event types if empty.
+        """
+        pool_set = {pool.lower() for pool in pools} if pools else None
+        actions = _query_actions(actions, self.event_filter)
+        if actions == []:
+            return iter(())
+        if not self.presorted:
+            return merge_events(
+                self._iter_shard(shard, from_block, to_block, pool_set, actions)
+                for shard in self.sources
+            )
+        return merge_events(
+            itertools.chain.from_iterable(
+                self._iter_shard(shard, from_block, to_block, pool_set, actions)
+                for shard in shards
+            )
+            for pool, shards in self.pool_shards().items()
+            if pool_set is None or pool in pool_set
+        )
+
+    def stream(
+        self,
+        chain: Chain,
+        pool_addresses: list[str],
+        from_block: int,
+        to_block: int,
+        subset: Optional[list[str]] = None,
+    ) -> Iterator[UniswapV3Event]:
+        """Yield the events of a ``_load_data`` query in chain order while parsing.
+
+        ``pagination.PaginatedReplayAgent`` replays this stream block by block
+        instead of loading the whole range first.
+
+        :param chain: The chain the pools are on.
+        :param pool_addresses: Pool addresses or names, e.g. ``"USDC/WETH-0.05"``.
+        :param from_block: First block of the range, inclusive.
+        :param to_block: Last block of the range, inclusive.
+        :param subset: Only yield these event types. All event types if empty.
+        """
+        pools = [pool_address(chain, pool) for pool in pool_addresses]
+        return self.iter_events(from_block, to_block, pools=pools, actions=subset)
+
+    def _load_data(self, chain: Chain, pool_addresses: list[str], from_block: int, to_block: int, subset: Optional[list[Literal["Burn", "Mint", "Swap"]]] = None) -> list[UniswapV3Event]:  # type: ignore[override]
+        return list(
+            self.stream(chain, pool_addresses, from_block, to_block, subset)  # type: ignore[arg-type]
+        )
@@ -0,0 +1,72 @@
+"""Block-keyed index over a flat array of replay events."""
+from typing import Generic, Iterable, Optional, Protocol, Sequence, TypeVar
+
+import numpy as np
+
+
+class IndexableEvent(Protocol):
+    """The fields of an event that the index needs to know about."""
+
+    block: int
+    log_index: int
+    action: str
+    pool: str
+
+
+E = TypeVar("E", bound=IndexableEvent)
+
+
+class EventIndex(Generic[E]):
+    """Events sorted by (block, log_index) with a sorted block array on top.
+
+    ``blocks`` holds every block that has at least one event, in ascending order.
+    ``offsets[i]`` is the position in ``events`` of the first event of ``blocks[i]``,
+    and ``offsets[-1] == len(events)``. A range query is therefore two binary
+    searches over ``blocks`` followed by one slice of ``events``.
+
+    :param events: The events to index, in any order.
+    """
+
+    def __init__(self, events: Iterable[E]) -> None:  # noqa: D107
+        self.events: list[E] = sorted(events, key=lambda e: (e.block, e.log_index))
+        event_blocks = np.fromiter(
+            (event.block for event in self.events),
+            dtype=np.int64,
+            count=len(self.events),
+        )
+        self.blocks, first_offsets = np.unique(event_blocks, return_index=True)
+        self.offsets = np.append(first_offsets, len(self.events)).astype(np.int64)
+
+    def __len__(self) -> int:  # noqa: D105
+        return len(self.events)
+
+    def span(self, from_block: int, to_block: int) -> tuple[int, int]:
+        """Positions in ``events`` covering all blocks in [from_block, to_block]."""
+        lo = int(np.searchsorted(self.blocks, from_block, side="left"))
+        hi = int(np.searchsorted(self.blocks, to_block, side="right"))
+        return int(self.offsets[lo]), int(self.offsets[hi])
+
+    def query(
+        self,
+        from_block: int,
+        to_block: int,
+        pools: Optional[Sequence[str]] = None,
+        actions: Optional[Sequence[str]] = None,
+    ) -> list[E]:
+        """Return the events in [from_block, to_block], in chain order.
+
+        :param from_block: First block of the range, inclusive.
+        :param to_block: Last block of the range, inclusive.
+        :param pools: Only return events on these pool addresses. All pools if empty.
+        :param actions: Only return these event types, e.g. ``["Swap"]``. All event
+            types if empty.
+        """
+        start, stop = self.span(from_block, to_block)
+        selected = self.events[start:stop]
+        if pools:
+            pool_set = {pool.lower() for pool in pools}
+            selected = [event for event in selected if event.pool in pool_set]
+        if actions:
+            action_set = set(actions)
+            selected = [event for event in selected if event.action in action_set]
+        return selected
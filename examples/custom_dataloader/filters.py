@@ -0,0 +1,87 @@
+"""Event filters that the custom loaders apply before building dojo events."""
+from dataclasses import dataclass
+from typing import Optional, Sequence
+
+from records import CompactEvent
+
+
+@dataclass(frozen=True)
+class EventFilter:
+    """Which events of the export to replay.
+
+    Every criterion is optional and the defaults let all events through. Mints and
+    burns are matched by their owner and tick range, swaps by their sender or
+    recipient and by the tick after the swap. The swap size criteria only apply to
+    swaps.
+
+    :param actions: Only replay these event types. All event types if empty.
+    :param min_abs_amount0: Drop swaps that move fewer than this many raw units of
+        token0.
+    :param min_abs_amount1: Drop swaps that move fewer than this many raw units of
+        token1.
+    :param tick_window: Drop mints and burns whose position does not overlap this
+        (lower, upper) tick range, and swaps that end outside of it. See
+        :meth:`around_tick`.
+    :param owners: Only replay events of these addresses, i.e. mints and burns they
+        own and swaps they send or receive. All addresses if empty.
+    :param exclude_owners: Drop events of these addresses.
+    """
+
+    actions: Optional[Sequence[str]] = None
+    min_abs_amount0: int = 0
+    min_abs_amount1: int = 0
+    tick_window: Optional[tuple[int, int]] = None
+    owners: Optional[Sequence[str]] = None
+    exclude_owners: Sequence[str] = ()
+
+    def __post_init__(self) -> None:
+        # Owner addresses are compared case-insensitively.
+        if self.owners:
+            owners = frozenset(owner.lower() for owner in self.owners)
+            object.__setattr__(self, "owners", owners)
+        excluded = frozenset(owner.lower() for owner in self.exclude_owners)
+        object.__setattr__(self, "exclude_owners", excluded)
+
+    @classmethod
+    def around_tick(
+        cls, tick: int, width: int, **kwargs: object
+    ) -> "EventFilter":
+        """Filter events to prices within ``width`` ticks of ``tick``.
+
+        :param tick: The tick of the current price, e.g. from ``obs.slot0(pool)``.
+        :param width: Number of ticks on either side of ``tick`` to keep.
+        :param kwargs: Any other criteria of the filter.
+        """
+        return cls(tick_window=(tick - width, tick + width), **kwargs)  # type: ignore
+
+    def combined_actions(
+        self, subset: Optional[Sequence[str]]
+    ) -> Optional[list[str]]:
+        """Event types allowed by both the filter and a loader ``subset``."""
+        if not self.actions:
+            return list(subset) if subset else None
+        if not subset:
+            return list(self.actions)
+        return [action for action in self.actions if action in subset]
+
+    def matches(self, record: CompactEvent) -> bool:
+        """Whether a compact event passes every criterion but the event type."""
+        if record.action == "Swap":
+            if (
+                abs(record.amount0) < self.min_abs_amount0
+                or abs(record.amount1) < self.min_abs_amount1
+            ):
+                return False
+            tick_lower = tick_upper = record.tick
+            addresses = [record.sender, record.recipient]
+        else:
+            tick_lower, tick_upper = record.tick_lower, record.tick_upper
+            addresses = [record.owner]
+        if self.tick_window is not None:
+            lower, upper = self.tick_window
+            if tick_upper < lower or tick_lower > upper:
+                return False
+        addresses = [(address or "").lower() for address in addresses]
+        if self.owners and not any(address in self.owners for address in addresses):
+            return False
+        return not any(address in self.exclude_owners for address in addresses)
@@ -0,0 +1,220 @@
+"""Replay long block ranges in fixed-size windows that are loaded ahead of time."""
+from collections import defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Generic, Literal, Optional, Sequence, TypeVar, Union
+
+from event_index import IndexableEvent
+from streaming import BlockStream
+
+from dojo.common.constants import Chain
+from dojo.dataloaders import UniswapV3Loader
+from dojo.dataloaders.base_uniswapV3_loader import BaseUniswapV3Loader
+from dojo.market_agents.uniswapV3 import BaseMarketPolicy, HistoricReplayAgent
+
+E = TypeVar("E", bound=IndexableEvent)
+
+
+class PrefetchingEventPager(Generic[E]):
+    """Serve events block by block, loading one window of blocks at a time.
+
+    While the simulation steps through the current window, the next one is loaded
+    on a background thread, so at most two windows are held in memory and a step
+    only waits for data if loading a window takes longer than simulating one. The
+    thread is stopped once the last window has been loaded, or by ``close``.
+
+    Blocks are looked up like in a ``dict[int, list[event]]``, which lets the pager
+    stand in for the per-block event map of the replay policy.
+
+    :param load: Loads the events in [from_block, to_block], e.g. a loader's
+        ``_load_data`` with everything but the block range bound.
+    :param block_range: The full range that will be replayed.
+    :param window_size: Number of blocks per window.
+    """
+
+    def __init__(
+        self,
+        load: Callable[[int, int], Sequence[E]],
+        block_range: tuple[int, int],
+        window_size: int = 1_000,
+    ) -> None:  # noqa: D107
+        self._load = load
+        self.start_block, self.end_block = block_range
+        self.window_size = window_size
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._window = -1
+        self._events: dict[int, list[E]] = {}
+        self._prefetch: Optional[tuple[int, Future[Sequence[E]]]] = None
+        self._schedule(0)
+
+    def _bounds(self, window: int) -> tuple[int, int]:
+        from_block = self.start_block + window * self.window_size
+        return from_block, min(from_block + self.window_size - 1, self.end_block)
+
+    def _schedule(self, window: int) -> None:
+        from_block, to_block = self._bounds(window)
+        if from_block > self.end_block:
+            self._prefetch = None
+            self.close()
+            return
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="event-prefetch"
+            )
+        future = self._executor.submit(self._load, from_block, to_block)
+        self._prefetch = (window, future)
+
+    def _advance(self, window: int) -> None:
+        if self._prefetch is not None and self._prefetch[0] == window:
+            events = self._prefetch[1].result()
+        else:
+            # The replay jumped past the prefetched window.
+            if self._prefetch is not None:
+                self._prefetch[1].cancel()
+            events = self._load(*self._bounds(window))
+
+        by_block: defaultdict[int, list[E]] = defaultdict(list)
+        for event in events:
+            by_block[event.block].append(event)
+        self._events = by_block
+        self._window = window
+        self._schedule(window + 1)
+
+    def events_for(self, block: int) -> list[E]:
+        """Return the events of ``block``, loading its window if needed."""
+        if not self.start_block <= block <= self.end_block:
+            return []
+        window = (block - self.start_block) // self.window_size
+        if window != self._window:
+            self._advance(window)
+        return self._events.get(block, [])
+
+    def __getitem__(self, block: int) -> list[E]:  # noqa: D105
+        return self.events_for(block)
+
+    def __contains__(self, block: object) -> bool:  # noqa: D105
+        return isinstance(block, int) and bool(self.events_for(block))
+
+    def get(self, block: int, default: Optional[list[E]] = None) -> list[E]:
+        """Return the events of ``block``, like ``dict.get``."""
+        return self.events_for(block) or (default if default is not None else [])
+
+    def pop(self, block: int, default: Optional[list[E]] = None) -> list[E]:
+        """Return the events of ``block`` and release them, like ``dict.pop``."""
+        events = self.get(block, default)
+        self._events.pop(block, None)
+        return events
+
+    def close(self) -> None:
+        """Stop the background thread."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def __enter__(self) -> "PrefetchingEventPager[E]":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+class _QueryRecorder(BaseUniswapV3Loader):
+    """Loader handed to the replay policy, recording its query instead of running it.
+
+    :param loader: The loader the query is meant for.
+    """
+
+    def __init__(self, loader: BaseUniswapV3Loader) -> None:  # noqa: D107
+        super().__init__()
+        self.loader = loader
+        self.query: Optional[tuple[Chain, list[str], Optional[list[str]]]] = None
+
+    def _load_data(  # type: ignore[override]
+        self,
+        chain: Chain,
+        pool_addresses: list[str],
+        from_block: int,
+        to_block: int,
+        subset: Optional[list[str]] = None,
+    ) -> list[Any]:
+        self.query = chain, pool_addresses, subset
+        return []
+
+
+class PaginatedReplayAgent(HistoricReplayAgent):
+    """Historic replay agent that loads its events window by window.
+
+    The standard agent loads every event of the block range before the simulation
+    starts. This one hands the replay policy a :class:`PrefetchingEventPager`
+    instead, so memory is bounded by ``window_size`` and loading overlaps with the
+    simulation. Loaders with a ``stream`` method, such as
+    ``StreamingCustomDataLoader``, are read once as a :class:`BlockStream` instead,
+    which advances with the replay. The loader is wrapped, not subclassed, to learn
+    the query of the policy, and the pager replaces the per-block event map
+    ``replay_events`` of dojo's ``BaseMarketPolicy``.
+
+    :param window_size: Number of blocks per window.
+    """
+
+    def __init__(
+        self,
+        chain: Chain,
+        pools: list[str],
+        block_range: tuple[int, int],
+        mode: Literal["standard", "swaps_only"] = "standard",
+        name: str = "MarketAgent",
+        Dataloader: Callable[..., BaseUniswapV3Loader] = UniswapV3Loader,
+        window_size: int = 1_000,
+    ):
+        """Initialize the agent.
+
+        :param chain: Agent is for a specific chain.
+        :param pools: List of pools that the agent should be active on.
+        :param block_range: Range of blocks to replay.
+        :param mode: In standard mode, all events are replayed. In swaps_only mode,
+            only swaps are replayed.
+        :param name: Name of the agent.
+        :param Dataloader: The loader to page through, a loader class or any callable
+            returning a loader, e.g. a ``functools.partial`` binding a filter.
+        :param window_size: Number of blocks per window. Unused with a loader that
+            streams.
+        """
+        recorders: list[_QueryRecorder] = []
+
+        def record_query(*args: Any, **kwargs: Any) -> _QueryRecorder:
+            recorders.append(_QueryRecorder(Dataloader(*args, **kwargs)))
+            return recorders[-1]
+
+        super().__init__(
+            chain=chain,
+            pools=pools,
+            block_range=block_range,
+            mode=mode,
+            name=name,
+            Dataloader=record_query,  # type: ignore[arg-type]
+        )
+        if not isinstance(self.policy, BaseMarketPolicy) or not recorders:
+            raise TypeError("The replay policy of this dojo version cannot be paged.")
+        recorder = recorders[-1]
+        if recorder.query is None:
+            raise TypeError("The replay policy did not query its loader.")
+        chain, pool_addresses, subset = recorder.query
+
+        self.pager: Union[PrefetchingEventPager[Any], BlockStream[Any]]
+        stream = getattr(recorder.loader, "stream", None)
+        if stream is not None:
+            events = stream(chain, pool_addresses, *block_range, subset)
+            self.pager = BlockStream(events)
+            self.policy.replay_events = self.pager
+            return
+
+        def load(from_block: int, to_block: int) -> list[Any]:
+            return recorder.loader._load_data(  # type: ignore[no-any-return]
+                chain, pool_addresses, from_block, to_block, subset
+            )
+
+        self.pager = PrefetchingEventPager(load, block_range, window_size=window_size)
+        self.policy.replay_events = self.pager
+
+    def close(self) -> None:
+        """Stop loading events, e.g. when the simulation ends early."""
+        self.pager.close()
@@ -0,0 +1,116 @@
+"""Compact in-memory representation of Uniswap V3 replay events."""
+import sys
+from pathlib import Path
+from typing import Any, Optional
+
+from streaming import iter_json_array
+
+
+class CompactEvent:
+    """A Uniswap V3 event stored in slots, with plain ints and interned strings.
+
+    Mints and burns carry their owner and tick range, swaps the tick after the swap,
+    their sender and their recipient. The loader keeps these instead of the dojo
+    event dataclasses, which carry an instance dict, two lists and their own copy of
+    every address string. The full ``dojo.dataloaders.formats`` object is only built
+    once the event is handed to the market agent.
+    """
+
+    __slots__ = (
+        "block",
+        "log_index",
+        "timestamp",
+        "action",
+        "pool",
+        "owner",
+        "amount0",
+        "amount1",
+        "tick_lower",
+        "tick_upper",
+        "tick",
+        "sender",
+        "recipient",
+    )
+
+    def __init__(
+        self,
+        block: int,
+        log_index: int,
+        timestamp: int,
+        action: str,
+        pool: str,
+        amount0: int,
+        amount1: int,
+        owner: Optional[str] = None,
+        tick_lower: int = 0,
+        tick_upper: int = 0,
+        tick: int = 0,
+        sender: Optional[str] = None,
+        recipient: Optional[str] = None,
+    ) -> None:  # noqa: D107
+        self.block = block
+        self.log_index = log_index
+        self.timestamp = timestamp
+        self.action = action
+        self.pool = pool
+        self.amount0 = amount0
+        self.amount1 = amount1
+        self.owner = owner
+        self.tick_lower = tick_lower
+        self.tick_upper = tick_upper
+        self.tick = tick
+        self.sender = sender
+        self.recipient = recipient
+
+    def __repr__(self) -> str:  # noqa: D105
+        return (
+            f"CompactEvent({self.action} block={self.block} "
+            f"log_index={self.log_index} pool={self.pool})"
+        )
+
+
+def compact_from_row(event: dict[str, Any]) -> Optional[CompactEvent]:
+    """Convert one row of the amberdata export into a compact event.
+
+    :param event: A single decoded JSON object from the export.
+    :raises ValueError: When the event type is unknown.
+    """
+    action = event["action"]
+    match action:
+        case "Mint" | "Burn":
+            return CompactEvent(
+                block=int(event["blockNumber"]),
+                log_index=int(event["logIndex"]),
+                timestamp=int(event["timestamp"]),
+                action=sys.intern(action),
+                pool=sys.intern(event["poolAddress"].lower()),
+                amount0=int(event["amount0"]),
+                amount1=int(event["amount1"]),
+                owner=sys.intern(event["owner"]),
+                tick_lower=int(event["tickLower"]),
+                tick_upper=int(event["tickUpper"]),
+            )
+        case "Swap":
+            return CompactEvent(
+                block=int(event["blockNumber"]),
+                log_index=int(event["logIndex"]),
+                timestamp=int(event["timestamp"]),
+                action=sys.intern(action),
+                pool=sys.intern(event["poolAddress"].lower()),
+                amount0=int(event["amount0"]),
+                amount1=int(event["amount1"]),
+                tick=int(event["tick"]),
+                sender=sys.intern(event["sender"]),
+                recipient=sys.intern(event["recipient"]),
+            )
+        case "Collect" | "Initialize":
+            # TODO needs to be implemented
+            return None
+        case _:
+            raise ValueError(f"Unknown event type: {action}")
+
+
+def read_records(path: Path) -> list[CompactEvent]:
+    """Parse one export file into compact events. Runs in a worker process."""
+    records = (compact_from_row(row) for row in iter_json_array(path))
+    return [record for record in records if record is not None]
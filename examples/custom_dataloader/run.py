@@ -2,18 +2,23 @@
 
 One active one passive.
 """
+import sys
 from decimal import Decimal
+from pathlib import Path
 from typing import Any, Optional
 
-from custom_loader import CustomDataLoader
-from policy import MovingAveragePolicy
-
 from dojo.agents.uniswapV3 import TotalWealthAgent
 from dojo.common.constants import Chain
-from dojo.environments import UniswapV3Env
-from dojo.market_agents.uniswapV3 import HistoricReplayAgent
 from dojo.runners import backtest_run
 
+# Examples run as scripts from their own directory, the shared helpers are in the
+# repository root.
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from custom_loader import StreamingCustomDataLoader  # noqa: E402
+from environments.cached_uniswapV3 import CachedUniswapV3Env  # noqa: E402
+from pagination import PaginatedReplayAgent  # noqa: E402
+from policy import MovingAveragePolicy  # noqa: E402
+
 
 def main(
     *,
@@ -27,9 +32,14 @@ def main(
     chain = Chain.ETHEREUM
     block_range = 21302933, 21354333
 
-    Loader = CustomDataLoader
+    # The export is parsed as the replay advances, with the pools merged in chain
+    # order, so it does not have to fit in memory. CustomDataLoader compiles it into
+    # a columnar cache instead, and PaginatedReplayAgent then loads it in windows.
+    # To replay only part of the flow, bind a filter, e.g. functools.partial(
+    # StreamingCustomDataLoader, event_filter=EventFilter(actions=["Swap"])).
+    Loader = StreamingCustomDataLoader
 
-    market_agent = HistoricReplayAgent(
+    market_agent = PaginatedReplayAgent(
         chain=chain, pools=pools, block_range=block_range, Dataloader=Loader
     )
 
@@ -48,7 +58,7 @@ def main(
     )
 
     # Simulation environment (Uniswap V3)
-    env = UniswapV3Env(
+    env = CachedUniswapV3Env(
         chain=chain,
         block_range=block_range,
         agents=[market_agent, trader_agent],
@@ -66,6 +76,7 @@ def main(
         simulation_title="Using custom dataloader",
         simulation_description="Using custom dataloader.",
     )
+    market_agent.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,148 @@
+"""Incremental parsing of large JSON event exports."""
+import heapq
+import json
+from operator import attrgetter
+from pathlib import Path
+from typing import Any, Generic, Iterable, Iterator, Optional, TypeVar
+
+from event_index import IndexableEvent
+
+E = TypeVar("E", bound=IndexableEvent)
+
+_WHITESPACE = " \t\n\r"
+
+
+def iter_json_array(path: Path, chunk_size: int = 1 << 16) -> Iterator[Any]:
+    """Yield the elements of a top-level JSON array one at a time.
+
+    The file is read in chunks of ``chunk_size`` characters and only the element
+    currently being decoded is kept in memory, so peak memory does not depend on the
+    size of the file.
+
+    :param path: Path to a file holding a single JSON array.
+    :param chunk_size: Number of characters to read from the file at a time.
+    :raises ValueError: When the file does not hold a JSON array.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, "r") as f:
+        buffer = ""
+        pos = 0
+        eof = False
+        in_array = False
+
+        while True:
+            while pos < len(buffer) and (
+                buffer[pos] in _WHITESPACE or (in_array and buffer[pos] == ",")
+            ):
+                pos += 1
+
+            if pos < len(buffer):
+                if not in_array:
+                    if buffer[pos] != "[":
+                        raise ValueError(f"{path} does not contain a JSON array.")
+                    in_array = True
+                    pos += 1
+                    continue
+                if buffer[pos] == "]":
+                    return
+                try:
+                    item, end = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                else:
+                    # A scalar that ends exactly at the buffer end may be truncated.
+                    if end < len(buffer) or eof:
+                        yield item
+                        pos = end
+                        continue
+            elif eof:
+                raise ValueError(f"{path} ended before the JSON array was closed.")
+
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buffer = buffer[pos:] + chunk
+            pos = 0
+
+
+def merge_events(streams: Iterable[Iterable[E]]) -> Iterator[E]:
+    """Merge event streams that are each sorted by (block, log_index).
+
+    This is a lazy k-way merge: it holds one pending event per stream, so memory
+    grows with the number of streams and not with the number of events.
+
+    :param streams: One sorted stream per source, e.g. per pool.
+    """
+    return heapq.merge(*streams, key=attrgetter("block", "log_index"))
+
+
+class BlockStream(Generic[E]):
+    """Serve the events of one block at a time from a block-ordered stream.
+
+    Blocks must be requested in ascending order. Only the events of the block being
+    served and the next pending event are held, and the stream is only advanced as
+    far as the requested block. With a stream that yields while it parses, such as
+    ``StreamingCustomDataLoader.stream`` on presorted shards, the replay starts once
+    the first block has been parsed. A stream that sorts its input first only
+    yields once it has read it.
+
+    Blocks are looked up like in a ``dict[int, list[event]]``, which lets the stream
+    stand in for the per-block event map of the replay policy.
+
+    :param events: Events sorted by (block, log_index).
+    """
+
+    def __init__(self, events: Iterable[E]) -> None:  # noqa: D107
+        self._events = iter(events)
+        self._lookahead: Optional[E] = None
+        self._exhausted = False
+        self._block: Optional[int] = None
+        self._block_events: list[E] = []
+
+    def _next(self) -> Optional[E]:
+        event = next(self._events, None)
+        self._exhausted = event is None
+        return event
+
+    def events_for(self, block: int) -> list[E]:
+        """Return the events of ``block`` and drop everything before it."""
+        if block == self._block:
+            return self._block_events
+        if self._block is not None and block < self._block:
+            return []
+        if self._lookahead is None and not self._exhausted:
+            self._lookahead = self._next()
+        while self._lookahead is not None and self._lookahead.block < block:
+            self._lookahead = self._next()
+
+        block_events: list[E] = []
+        while self._lookahead is not None and self._lookahead.block == block:
+            block_events.append(self._lookahead)
+            self._lookahead = self._next()
+        self._block, self._block_events = block, block_events
+        return block_events
+
+    def __getitem__(self, block: int) -> list[E]:  # noqa: D105
+        return self.events_for(block)
+
+    def __contains__(self, block: object) -> bool:  # noqa: D105
+        return isinstance(block, int) and bool(self.events_for(block))
+
+    def get(self, block: int, default: Optional[list[E]] = None) -> list[E]:
+        """Return the events of ``block``, like ``dict.get``."""
+        return self.events_for(block) or (default if default is not None else [])
+
+    def pop(self, block: int, default: Optional[list[E]] = None) -> list[E]:
+        """Return the events of ``block`` and release them, like ``dict.pop``."""
+        events = self.get(block, default)
+        if block == self._block:
+            self._block_events = []
+        return events
+
+    def close(self) -> None:
+        """Stop reading the stream, closing it if it is a generator."""
+        close = getattr(self._events, "close", None)
+        if close is not None:
+            close()
+        self._lookahead = None
+        self._exhausted = True
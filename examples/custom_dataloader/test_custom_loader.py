@@ -0,0 +1,71 @@
+"""Tests of the custom loaders against the bundled sample export."""
+from pathlib import Path
+from typing import Optional
+
+import pytest
+
+pytest.importorskip("dojo")
+
+from custom_loader import (  # noqa: E402
+    DEFAULT_DATA_PATH,
+    CustomDataLoader,
+    StreamingCustomDataLoader,
+)
+
+from filters import EventFilter  # noqa: E402
+
+from dojo.common.constants import Chain  # noqa: E402
+from dojo.dataloaders.base_uniswapV3_loader import BaseUniswapV3Loader  # noqa: E402
+
+# The sample holds events of the USDC/WETH 1% pool only.
+SAMPLE_POOL = "USDC/WETH-1"
+SAMPLE_ADDRESS = "0x7BeA39867e4169DBe237d55C8242a8f2fcDcc387"
+FROM_BLOCK, TO_BLOCK = 15_053_000, 15_056_000
+
+
+def _loaders(
+    tmp_path: Path, event_filter: Optional[EventFilter] = None
+) -> list[BaseUniswapV3Loader]:
+    return [
+        CustomDataLoader(cache_dir=tmp_path / "columns", event_filter=event_filter),
+        CustomDataLoader(use_cache=False, event_filter=event_filter),
+        StreamingCustomDataLoader(DEFAULT_DATA_PATH, event_filter=event_filter),
+    ]
+
+
+def test_loaders_accept_the_pool_names_dojo_passes(tmp_path: Path) -> None:
+    for loader in _loaders(tmp_path):
+        events = loader._load_data(Chain.ETHEREUM, [SAMPLE_POOL], FROM_BLOCK, TO_BLOCK)
+        assert [(event.block, event.action) for event in events] == [
+            (15053241, "Swap"),
+            (15054824, "Mint"),
+            (15054824, "Mint"),
+            (15055171, "Burn"),
+        ]
+        by_address = loader._load_data(
+            Chain.ETHEREUM, [SAMPLE_ADDRESS], FROM_BLOCK, TO_BLOCK
+        )
+        assert len(by_address) == len(events)
+
+
+def test_loaders_skip_other_pools(tmp_path: Path) -> None:
+    for loader in _loaders(tmp_path):
+        events = loader._load_data(
+            Chain.ETHEREUM, ["USDC/WETH-0.05"], FROM_BLOCK, TO_BLOCK, subset=["Swap"]
+        )
+        assert events == []
+
+
+def test_filters_match_swaps_on_tick_and_addresses(tmp_path: Path) -> None:
+    swapper = "0xBEEFBABEEA323F07C59926295205D3B7A17E8638"
+    for event_filter, expected in [
+        (EventFilter(tick_window=(206_000, 207_000)), 1),
+        (EventFilter(tick_window=(200_000, 206_000)), 0),
+        (EventFilter(owners=[swapper]), 1),
+        (EventFilter(exclude_owners=[swapper]), 0),
+    ]:
+        for loader in _loaders(tmp_path, event_filter):
+            events = loader._load_data(
+                Chain.ETHEREUM, [SAMPLE_POOL], FROM_BLOCK, TO_BLOCK, subset=["Swap"]
+            )
+            assert len(events) == expected
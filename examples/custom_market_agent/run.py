@@ -1,16 +1,21 @@
 """Run simulation with a custom market agent."""
+import sys
 from decimal import Decimal
+from pathlib import Path
 from typing import Any, Optional
 
-from custom_market_agent import CustomMarketAgent
-from policy import MovingAveragePolicy
-
 from dojo.agents.uniswapV3 import TotalWealthAgent
-from dojo.common import time_to_block
 from dojo.common.constants import Chain
-from dojo.environments import UniswapV3Env
 from dojo.runners import backtest_run
 
+# Examples run as scripts from their own directory, the shared helpers are in the
+# repository root.
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from common.block_index import time_to_block  # noqa: E402
+from custom_market_agent import CustomMarketAgent  # noqa: E402
+from environments.cached_uniswapV3 import CachedUniswapV3Env  # noqa: E402
+from policy import MovingAveragePolicy  # noqa: E402
+
 
 def main(
     *,
@@ -24,10 +29,8 @@ def main(
     pools = ["USDC/WETH-0.05"]
     start_time = "2024-12-06 13:00:00"
     chain = Chain.ETHEREUM
-    block_range = (
-        time_to_block(start_time, chain),
-        time_to_block(start_time, chain) + num_sim_blocks,
-    )
+    start_block = time_to_block(start_time, chain)
+    block_range = (start_block, start_block + num_sim_blocks)
 
     # Agents
     market_agent = CustomMarketAgent(chain=chain, pools=pools, block_range=block_range)
@@ -46,7 +49,7 @@ def main(
     )
 
     # Simulation environment (Uniswap V3)
-    env = UniswapV3Env(
+    env = CachedUniswapV3Env(
         chain=Chain.ETHEREUM,
         block_range=block_range,
         agents=[market_agent, mavg_agent],
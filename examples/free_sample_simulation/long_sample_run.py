@@ -1,18 +1,23 @@
 """Run the free sample period."""
+import sys
 from datetime import timedelta
 from decimal import Decimal
+from pathlib import Path
 from typing import Any, Optional
 
-from passiveLP import PassiveConcentratedLP
-from policy import MovingAveragePolicy
-
 from dojo.agents.uniswapV3 import TotalWealthAgent
-from dojo.common import time_to_block
 from dojo.common.constants import Chain
-from dojo.environments import UniswapV3Env
 from dojo.market_agents.uniswapV3 import HistoricReplayAgent
 from dojo.runners import backtest_run
 
+# Examples run as scripts from their own directory, the shared helpers are in the
+# repository root.
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from common.block_index import time_to_block  # noqa: E402
+from environments.cached_uniswapV3 import CachedUniswapV3Env  # noqa: E402
+from passiveLP import PassiveConcentratedLP  # noqa: E402
+from policy import MovingAveragePolicy  # noqa: E402
+
 
 def main(
     *,
@@ -27,10 +32,8 @@ def main(
     pools = ["USDC/WETH-0.05"]
     start_time = "2024-12-01 00:00:00"
     chain = Chain.ETHEREUM
-    block_range = (
-        time_to_block(start_time, chain),
-        time_to_block(start_time, chain) + num_sim_blocks,
-    )
+    start_block = time_to_block(start_time, chain)
+    block_range = (start_block, start_block + num_sim_blocks)
 
     # Agents
 
@@ -59,7 +62,7 @@ def main(
     )
 
     # Simulation environment (Uniswap V3)
-    env = UniswapV3Env(
+    env = CachedUniswapV3Env(
         chain=chain,
         block_range=block_range,
         agents=[market_agent, agent1, agent2],
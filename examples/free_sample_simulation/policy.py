@@ -1,8 +1,9 @@
 """Policy for moving averages."""
-from collections import deque
 from decimal import Decimal
+from typing import Union
 
-import numpy as np
+from policies.indicators import EMA, SMA
+from policies.requirements import Requirement, price
 
 from dojo.actions.uniswapV3 import BaseUniswapV3Action, UniswapV3Trade
 from dojo.environments.uniswapV3 import UniswapV3Observation
@@ -16,22 +17,26 @@ class MovingAveragePolicy(UniswapV3Policy):
     :param agent: The agent which is using this policy.
     :param short_window: The short window length for the moving average.
     :param long_window: The long window length for the moving average.
+    :param exponential: Use exponential instead of simple moving averages.
     """
 
-    def __init__(self, pool: str, short_window: int, long_window: int) -> None:
+    def __init__(
+        self, pool: str, short_window: int, long_window: int, exponential: bool = False
+    ) -> None:
         """Moving agerave strategy on one Uniwap pool."""
         super().__init__()
         self._short_window_len: int = short_window
         self._long_window_len: int = long_window
-        self.long_window: deque[float] = deque(maxlen=long_window)
-        self.short_window: deque[float] = deque(maxlen=short_window)
+        average = EMA if exponential else SMA
+        self.long_window: Union[SMA, EMA] = average(long_window)
+        self.short_window: Union[SMA, EMA] = average(short_window)
         self.pool: str = pool
 
     # SNIPPET 1 END
 
     def _clear_windows(self) -> None:
-        self.long_window = deque(maxlen=self._long_window_len)
-        self.short_window = deque(maxlen=self._short_window_len)
+        self.long_window.clear()
+        self.short_window.clear()
 
     def _x_to_y_indicated(self, pool_tokens: tuple[str, str]) -> bool:
         """Check if the short window crosses above the long window.
@@ -39,7 +44,7 @@ class MovingAveragePolicy(UniswapV3Policy):
         Only do so if there are tokens left to trade.
         """
         return bool(
-            np.mean(self.short_window) > np.mean(self.long_window)
+            self.short_window.value > self.long_window.value
             and self.agent.quantity(pool_tokens[1]) > 0
         )
 
@@ -49,26 +54,31 @@ class MovingAveragePolicy(UniswapV3Policy):
         Only do so if there are tokens left to trade.
         """
         return bool(
-            np.mean(self.short_window) < np.mean(self.long_window)
+            self.short_window.value < self.long_window.value
             and self.agent.quantity(pool_tokens[0]) > 0
         )
 
+    def data_requirements(self, obs: UniswapV3Observation) -> list[Requirement]:
+        """Data ``predict`` reads in the current block, prefetched by the env."""
+        pool_tokens = obs.pool_tokens(pool=self.pool)
+        return [price(pool_tokens[0], pool_tokens[1], self.pool)]
+
     def predict(self, obs: UniswapV3Observation) -> list[BaseUniswapV3Action]:
         """Create actions from observations."""
         pool_tokens = obs.pool_tokens(pool=self.pool)
         price = obs.price(token=pool_tokens[0], unit=pool_tokens[1], pool=self.pool)
-        self.short_window.append(float(price))
-        self.long_window.append(float(price))
+        self.short_window.update(float(price))
+        self.long_window.update(float(price))
         obs.add_signal(
             "LongShortDiff",
-            float(np.mean(self.short_window) - np.mean(self.long_window)),
+            self.short_window.value - self.long_window.value,
         )
 
         # Only start trading when the windows are full
-        if len(self.short_window) < self._short_window_len:
+        if self.short_window.count < self._short_window_len:
             obs.add_signal("Locked", float(True))
             return []
-        if len(self.long_window) < self._long_window_len:
+        if self.long_window.count < self._long_window_len:
             obs.add_signal("Locked", float(True))
             return []
         obs.add_signal("Locked", float(False))
@@ -2,6 +2,8 @@
 from decimal import Decimal
 from typing import List, Tuple
 
+from common.signals import add_lazy_signals
+
 from dojo.actions.uniswapV3 import BaseUniswapV3Action, UniswapV3Quote
 from dojo.observations import uniswapV3
 from dojo.observations.uniswapV3 import UniswapV3Observation
@@ -12,6 +14,17 @@ from dojo.policies import UniswapV3Policy
 class ImpermanentLossPolicy(UniswapV3Policy):
     """Policy for tracking impermanent loss."""
 
+    SIGNALS = (
+        "Hodl Value in Token0",
+        "Hodl Value in Token1",
+        "Current Token0 Value",
+        "Current Token1 Value",
+        "Current Token0 Value With Fees",
+        "Current Token1 Value With Fees",
+        "Token0 Impermanent Loss",
+        "Token1 Impermanent Loss",
+    )
+
     def __init__(self) -> None:  # noqa: D107
         super().__init__()
         self.has_provided_liquidity = False
@@ -43,22 +56,35 @@ class ImpermanentLossPolicy(UniswapV3Policy):
         token0, token1 = obs.pool_tokens(pool)
         token_ids = self.agent.get_liquidity_ownership_tokens()
 
-        current_portfolio = obs.lp_portfolio(token_ids)
-        current_quantities = obs.lp_quantities(token_ids)
-
-        if current_portfolio == {}:
+        # Positions are told apart by their token ids, so the LP portfolio is only
+        # valued in blocks in which a signal is recorded.
+        if not token_ids:
             token0_amount, token1_amount = self.calculate_initial_signal(obs)
-            current_portfolio.update({token0: token0_amount, token1: token1_amount})
-            current_quantities.update({token0: token0_amount, token1: token1_amount})
             self.initial_lp_positions.update(
                 {token0: token0_amount, token1: token1_amount}
             )
         elif not self.has_provided_liquidity:
             self.has_provided_liquidity = True
+            current_quantities = obs.lp_quantities(token_ids)
             self.initial_lp_positions.update(
                 {token0: current_quantities[token0], token1: current_quantities[token1]}
             )
 
+        add_lazy_signals(obs, self.SIGNALS, lambda: self._signal_values(obs, token_ids))
+
+    def _signal_values(
+        self, obs: UniswapV3Observation, token_ids: List[int]
+    ) -> dict[str, Decimal]:
+        pool = obs.pools[0]
+        token0, token1 = obs.pool_tokens(pool)
+
+        if not token_ids:
+            current_portfolio = dict(self.initial_lp_positions)
+            current_quantities = dict(self.initial_lp_positions)
+        else:
+            current_portfolio = obs.lp_portfolio(token_ids)
+            current_quantities = obs.lp_quantities(token_ids)
+
         value_if_held0 = self.initial_lp_positions[token0] + self.initial_lp_positions[
             token1
         ] * obs.price(token1, token0, pool)
@@ -74,14 +100,16 @@ class ImpermanentLossPolicy(UniswapV3Policy):
             token0
         ] * obs.price(token0, token1, pool)
 
-        obs.add_signal("Hodl Value in Token0", value_if_held0)
-        obs.add_signal("Hodl Value in Token1", value_if_held1)
-        obs.add_signal("Current Token0 Value", current_quantities[token0])
-        obs.add_signal("Current Token1 Value", current_quantities[token1])
-        obs.add_signal("Current Token0 Value With Fees", current_wealth0)
-        obs.add_signal("Current Token1 Value With Fees", current_wealth1)
-        obs.add_signal("Token0 Impermanent Loss", current_wealth0 - value_if_held0)
-        obs.add_signal("Token1 Impermanent Loss", current_wealth1 - value_if_held1)
+        return {
+            "Hodl Value in Token0": value_if_held0,
+            "Hodl Value in Token1": value_if_held1,
+            "Current Token0 Value": current_quantities[token0],
+            "Current Token1 Value": current_quantities[token1],
+            "Current Token0 Value With Fees": current_wealth0,
+            "Current Token1 Value With Fees": current_wealth1,
+            "Token0 Impermanent Loss": current_wealth0 - value_if_held0,
+            "Token1 Impermanent Loss": current_wealth1 - value_if_held1,
+        }
 
     # SNIPPET 3 END
 
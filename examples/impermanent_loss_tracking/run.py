@@ -1,17 +1,22 @@
 """Run backtest for impermanent loss tracking."""
+import sys
 from decimal import Decimal
+from pathlib import Path
 from typing import Any, Optional
 
-from policy import ImpermanentLossPolicy
-
 from dojo.agents import UniswapV3Agent
-from dojo.common import time_to_block
 from dojo.common.constants import Chain
-from dojo.environments import UniswapV3Env
 from dojo.market_agents.uniswapV3 import HistoricReplayAgent
 from dojo.observations import UniswapV3Observation
 from dojo.runners import backtest_run
 
+# Examples run as scripts from their own directory, the shared helpers are in the
+# repository root.
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from common.block_index import time_to_block  # noqa: E402
+from environments.cached_uniswapV3 import CachedUniswapV3Env  # noqa: E402
+from policy import ImpermanentLossPolicy  # noqa: E402
+
 
 class ImpermanentLossAgent(UniswapV3Agent):
     """An agent that evaluates impermanent loss in a UniswapV3 pool.
@@ -66,17 +71,20 @@ def main(
     simulation_status_bar: bool,
     auto_close: bool,
     num_sim_blocks: int = 3000,
+    headless: bool = False,
     **kwargs: dict[str, Any],
 ) -> None:
-    """Running this strategy."""
+    """Running this strategy.
+
+    :param headless: Record no signals, which skips valuing the LP position in every
+        block. Rewards are still recorded.
+    """
     pools = ["USDC/WETH-0.05"]
 
     chain = Chain.ETHEREUM
     start_time = "2024-12-06 13:00:00"
-    block_range = (
-        time_to_block(start_time, chain),
-        time_to_block(start_time, chain) + num_sim_blocks,
-    )
+    start_block = time_to_block(start_time, chain)
+    block_range = (start_block, start_block + num_sim_blocks)
 
     # Agents
     market_agent = HistoricReplayAgent(
@@ -93,12 +101,14 @@ def main(
     )
 
     # Simulation environment (Uniswap V3)
-    env = UniswapV3Env(
+    # Without dojo signals, the policy's lazy signals are never computed.
+    env = CachedUniswapV3Env(
         chain=chain,
         block_range=block_range,
         agents=[market_agent, impermanent_loss_agent],
         pools=pools,
         backend_type="forked",
+        dojo_signals=not headless,
     )
 
     backtest_run(
@@ -113,12 +123,23 @@ def main(
 
 
 if __name__ == "__main__":
+    import argparse
+
     import dojo.config.logging_config
 
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--headless",
+        action="store_true",
+        help="Run without the dashboard and without recording signals.",
+    )
+    args = parser.parse_args()
+
     dojo.config.logging_config.set_normal_logging_config_and_print_explanation()
     main(
-        dashboard_server_port=8768,
-        simulation_status_bar=True,
-        auto_close=False,
+        dashboard_server_port=None if args.headless else 8768,
+        simulation_status_bar=not args.headless,
+        auto_close=args.headless,
         num_sim_blocks=600,
+        headless=args.headless,
     )
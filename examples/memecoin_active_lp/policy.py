@@ -2,7 +2,10 @@
 from dataclasses import dataclass
 from decimal import Decimal
 from enum import Enum
-from typing import Union
+from typing import Any, Union
+
+from common.signals import add_lazy_signals
+from policies.requirements import Requirement, active_tick_range, price
 
 from dojo.actions.uniswapV3 import (
     BaseUniswapV3Action,
@@ -36,6 +39,15 @@ class _PositionInfo:
 class ActiveConcentratedLP(UniswapV3Policy):
     """Actively managing LP postions to always stay around the current price."""
 
+    SIGNALS = (
+        "LP fees earned",
+        "PEPE Price",
+        "PEPE Holdings in USD",
+        "Swap count",
+        "Swap volume",
+        "Impermanent Loss Active LPing",
+    )
+
     def __init__(self, lp_width: int) -> None:
         """Initialize the policy.
 
@@ -148,7 +160,7 @@ class ActiveConcentratedLP(UniswapV3Policy):
         self.state = State.IDLE
         return [action]
 
-    def compute_signals(self, obs: UniswapV3Observation) -> None:  # noqa: D102
+    def _signal_values(self, obs: UniswapV3Observation) -> dict[str, Any]:
         pool = obs.pools[0]
         token0, token1 = obs.pool_tokens(pool)
         token_ids = self.agent.get_liquidity_ownership_tokens()
@@ -171,21 +183,37 @@ class ActiveConcentratedLP(UniswapV3Policy):
                 )
         impermanent_loss = current_holdings - float(initial_holdings)
 
-        obs.add_signal(
-            "LP fees earned",
-            float(
+        return {
+            "LP fees earned": float(
                 current_fees.get(token0, 0) * obs.price(token0, token1, pool)
                 + current_fees.get(token1, 0)
             ),
-        )
-        obs.add_signal("PEPE Price", float(obs.price("PEPE", "USDC", pool)))
-        obs.add_signal(
-            "PEPE Holdings in USD",
-            float(current_portfolio.get(token0, 0) * obs.price(token0, token1, pool)),
-        )
-        obs.add_signal("Swap count", self.swap_count)
-        obs.add_signal("Swap volume", self.swap_volume)
-        obs.add_signal("Impermanent Loss Active LPing", impermanent_loss)
+            "PEPE Price": float(obs.price("PEPE", "USDC", pool)),
+            "PEPE Holdings in USD": float(
+                current_portfolio.get(token0, 0) * obs.price(token0, token1, pool)
+            ),
+            "Swap count": self.swap_count,
+            "Swap volume": self.swap_volume,
+            "Impermanent Loss Active LPing": impermanent_loss,
+        }
+
+    def compute_signals(self, obs: UniswapV3Observation) -> None:  # noqa: D102
+        add_lazy_signals(obs, self.SIGNALS, lambda: self._signal_values(obs))
+
+    def data_requirements(self, obs: UniswapV3Observation) -> list[Requirement]:
+        """Data ``predict`` reads in the current block, prefetched by the env.
+
+        The prices of the signals are left out, they are only read in blocks in
+        which the signals are recorded.
+        """
+        pool = obs.pools[0]
+        token0, token1 = obs.pool_tokens(pool)
+        match self.state:
+            case State.IDLE | State.REBALANCED:
+                return [price(token0, token1, pool), active_tick_range(pool)]
+            case State.INVESTED:
+                return [active_tick_range(pool)]
+        return []
 
     def predict(self, obs: UniswapV3Observation) -> list[BaseUniswapV3Action]:
         """Derive actions from observations."""
@@ -1,17 +1,22 @@
 """Run the active LP strategy."""
+import sys
 from decimal import Decimal
+from pathlib import Path
 from typing import Any, Optional
 
-from passive_lp_policy import PassiveConcentratedLP
-from policy import ActiveConcentratedLP
-
 from dojo.agents.uniswapV3 import PnLAgent
 from dojo.common.constants import Chain
-from dojo.common.time_to_block import time_to_block
-from dojo.environments import UniswapV3Env
 from dojo.market_agents.uniswapV3 import HistoricReplayAgent
 from dojo.runners import backtest_run
 
+# Examples run as scripts from their own directory, the shared helpers are in the
+# repository root.
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from common.block_index import time_to_block  # noqa: E402
+from environments.cached_uniswapV3 import CachedUniswapV3Env  # noqa: E402
+from passive_lp_policy import PassiveConcentratedLP  # noqa: E402
+from policy import ActiveConcentratedLP  # noqa: E402
+
 
 def main(
     *,
@@ -26,10 +31,8 @@ def main(
     pools = ["PEPE/USDC-1"]
     chain = Chain.ETHEREUM
     start_time = "2024-12-16 10:00:00"
-    block_range = (
-        time_to_block(start_time, chain),
-        time_to_block(start_time, chain) + num_sim_blocks,
-    )
+    start_block = time_to_block(start_time, chain)
+    block_range = (start_block, start_block + num_sim_blocks)
 
     market_agent = HistoricReplayAgent(
         chain=chain, pools=pools, block_range=block_range, mode="swaps_only"
@@ -53,7 +56,7 @@ def main(
     )
 
     # Simulation environment (Uniswap V3)
-    env = UniswapV3Env(
+    env = CachedUniswapV3Env(
         chain=chain,
         block_range=block_range,
         agents=[market_agent, active_lp_agent, passive_lp_agent],
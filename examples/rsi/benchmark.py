@@ -0,0 +1,107 @@
+"""Per-update cost of the incremental RSI against the previous implementation.
+
+The previous implementation kept the last ``period`` prices as Decimals and took
+``np.diff`` of the whole window on every block. Both are fed the same synthetic
+random walk, the largest difference between their outputs is reported, and the
+mean cost of one update is measured for several periods. It does not need dojo.
+
+    python benchmark.py --updates 20000 --periods 14 50 200
+"""
+import argparse
+import math
+import random
+import sys
+import time
+from collections import deque
+from decimal import Decimal
+from pathlib import Path
+from typing import Callable, Optional
+
+import numpy as np
+
+# Examples run as scripts from their own directory, the shared helpers are in the
+# repository root.
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from policies.indicators import RSI  # noqa: E402
+
+
+class DequeRSI:
+    """The RSI computation ``RSIPolicy`` used before ``RSI``."""
+
+    def __init__(self, period: int) -> None:  # noqa: D107
+        self.period = period
+        self.values: deque[Decimal] = deque(maxlen=period)
+        self.rsi: Optional[float] = None
+
+    def update(self, price: Decimal) -> Optional[float]:
+        """Add the next price and return the index, or None while warming up."""
+        self.values.append(price)
+        if len(self.values) == self.period:
+            delta = np.diff(self.values)  # type: ignore
+
+            gains = delta[delta > 0]
+            losses = -delta[delta < 0]
+            if losses.size == 0:
+                self.rsi = 100
+            elif gains.size == 0:
+                self.rsi = 0
+            else:
+                gain = Decimal(gains.mean())
+                loss = Decimal(losses.mean())
+                rs = gain / loss
+                self.rsi = float(100 - 100 / (1 + rs))
+        return self.rsi
+
+
+def random_walk(n: int, seed: int = 0) -> list[Decimal]:
+    """Prices like those returned by ``obs.price``, with some unchanged blocks."""
+    rng = random.Random(seed)
+    price = 3000.0
+    prices = []
+    for _ in range(n):
+        if rng.random() < 0.8:
+            price *= 1 + rng.gauss(0, 0.001)
+        prices.append(Decimal(price))
+    return prices
+
+
+def time_updates(update: Callable, prices: list) -> float:
+    """Mean seconds per call of ``update`` over ``prices``."""
+    start = time.perf_counter()
+    for price in prices:
+        update(price)
+    return (time.perf_counter() - start) / len(prices)
+
+
+def main() -> None:
+    """Compare both implementations and print the cost of one update."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--updates", type=int, default=20_000)
+    parser.add_argument("--periods", type=int, nargs="+", default=[14, 50, 200])
+    args = parser.parse_args()
+
+    prices = random_walk(args.updates)
+    floats = [float(price) for price in prices]
+    print(
+        f"{'period':>6} {'previous':>12} {'incremental':>12} {'speedup':>8}"
+        f" {'max diff':>9}"
+    )
+    for period in args.periods:
+        previous, incremental = DequeRSI(period), RSI(period)
+        max_diff = 0.0
+        for price, value in zip(prices, floats):
+            expected, actual = previous.update(price), incremental.update(value)
+            if expected is not None and not math.isnan(actual):
+                max_diff = max(max_diff, abs(expected - actual))
+
+        previous_cost = time_updates(DequeRSI(period).update, prices)
+        incremental_cost = time_updates(RSI(period).update, floats)
+        print(
+            f"{period:>6} {previous_cost * 1e6:>10.2f}µs"
+            f" {incremental_cost * 1e6:>10.2f}µs"
+            f" {previous_cost / incremental_cost:>7.0f}x {max_diff:>9.1e}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,8 @@
 """Example strategy for running uniswap RSI on arbitrum."""
-from collections import deque
+import math
 from decimal import Decimal
 
-import numpy as np
+from policies.indicators import RSI
 
 from dojo.actions import SleepAction
 from dojo.actions.uniswapV3 import BaseUniswapV3Action, UniswapV3Trade
@@ -22,7 +22,7 @@ class RSIPolicy(UniswapV3Policy):
     def __init__(self, agent: UniswapV3Agent):  # noqa: D107
         self.agent: UniswapV3Agent = agent
         self.rsi_period: int = 14
-        self.rsi_values: deque[Decimal] = deque(maxlen=self.rsi_period)
+        self.rsi_indicator = RSI(self.rsi_period)
         self.rsi: float = 0
         self.buying = False
         self.selling = False
@@ -40,21 +40,9 @@ class RSIPolicy(UniswapV3Policy):
         token0, token1 = obs.pool_tokens(pool)
 
         # calculate RSI
-        self.rsi_values.append(obs.price(token1, token0, pool))
-        if len(self.rsi_values) == self.rsi_period:
-            delta = np.diff(self.rsi_values)  # type: ignore
-
-            gains = delta[delta > 0]
-            losses = -delta[delta < 0]
-            if losses.size == 0:
-                self.rsi = 100
-            elif gains.size == 0:
-                self.rsi = 0
-            else:
-                gain = Decimal(gains.mean())
-                loss = Decimal(losses.mean())
-                rs = gain / loss
-                self.rsi = float(100 - 100 / (1 + rs))
+        rsi = self.rsi_indicator.update(float(obs.price(token1, token0, pool)))
+        if not math.isnan(rsi):
+            self.rsi = rsi
 
         obs.add_signal("RSI", self.rsi)
         # SNIPPET 2 END
@@ -1,12 +1,11 @@
 """Run uniswap RSI strategy on arbitrum."""
 import logging
+import sys
 from decimal import Decimal
+from pathlib import Path
 from typing import Any, Optional
 
-from policy import RSIPolicy
-
 from dojo.agents.uniswapV3 import TotalWealthAgent
-from dojo.common import time_to_block
 from dojo.common.constants import Chain
 
 # SNIPPET 1 START
@@ -15,6 +14,12 @@ from dojo.environments import UniswapV3Env
 # SNIPPET 1 END
 from dojo.runners import backtest_run
 
+# Examples run as scripts from their own directory, the shared helpers are in the
+# repository root.
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from common.block_index import time_to_block  # noqa: E402
+from policy import RSIPolicy  # noqa: E402
+
 
 def main(
     *,
@@ -29,6 +34,7 @@ def main(
     pools = ["WETH/USDC-0.05"]
     start_time = "2024-12-06 13:00:00"
     chain = Chain.ARBITRUM
+    start_block = time_to_block(start_time, chain)
 
     # Agents
     rsi_agent = TotalWealthAgent(
@@ -45,10 +51,7 @@ def main(
     # Simulation environment (Uniswap V3)
     env = UniswapV3Env(
         chain=Chain.ARBITRUM,
-        block_range=(
-            time_to_block(start_time, chain),
-            time_to_block(start_time, chain) + num_sim_blocks,
-        ),
+        block_range=(start_block, start_block + num_sim_blocks),
         agents=[rsi_agent],
         pools=pools,
         backend_type="forked",
@@ -1,12 +1,10 @@
 """Loading binance data."""
-import csv
-import io
-import zipfile
 from dataclasses import dataclass
 from datetime import datetime
-from typing import List
+from typing import Iterator, List, Optional, Sequence
 
-import requests
+import numpy as np
+from kline_archive import KLINE_DTYPE, KlineArchive, Month
 from pytz import UTC
 
 
@@ -29,53 +27,166 @@ class Binance_data_point:
     ignore: int
 
 
+def _epoch_ms(time: datetime) -> int:
+    """Milliseconds since the epoch, reading naive datetimes as UTC."""
+    if time.tzinfo is None:
+        time = time.replace(tzinfo=UTC)
+    return int(time.timestamp() * 1000)
+
+
+def _datetime(epoch_ms: int) -> datetime:
+    return datetime.fromtimestamp(epoch_ms / 1000.0, tz=UTC)
+
+
 class Binance_data:
-    """Represents an entire binance data file."""
+    """Represents an entire binance data file.
 
-    def __init__(self, data: List[Binance_data_point]):  # noqa: D107
-        self.data = data
+    The klines are held in a NumPy structured array sorted by time, with one field
+    per CSV column. Prices are read as whole arrays through the properties below and
+    ``Binance_data_point`` objects are only built for the klines that are looked up.
 
-    def find_nearest(self, target_time: datetime) -> Binance_data_point:
-        """Slow method of find the data closest time to target_time.
+    :param klines: Array of ``KLINE_DTYPE`` sorted by close time.
+    """
 
-        Removes all data prior or equal to target_time.
-        """
-        target_time.replace(tzinfo=UTC)
-        while True:
-            datum = self.data[0]
-            if datum.close_time < target_time:
-                self.data = self.data[1:]
-            else:
-                return datum
-        return datum
-
-
-def load_binance_data(year: int, month: int) -> Binance_data:
-    """Load binance data for a particular month."""
-    url = f"https://data.binance.vision/data/spot/monthly/klines/ETHUSDC/1m/ETHUSDC-1m-{year}-{month:02}.zip"
-    file_name = f"ETHUSDC-1m-{year}-{month:02}.csv"
-    zipfile_data_raw = requests.get(url)
-    zipfile_data = zipfile.ZipFile(io.BytesIO(zipfile_data_raw.content))
-    csv_data_raw = zipfile_data.read(file_name).decode("UTF-8")
-    csv_data = list(csv.reader(io.StringIO(csv_data_raw)))
-
-    def binance_data_point_of_list(args: List[str]) -> Binance_data_point:
+    def __init__(self, klines: np.ndarray):  # noqa: D107
+        self.klines = klines
+
+    @classmethod
+    def from_points(cls, data: List[Binance_data_point]) -> "Binance_data":
+        """Build the container from data points."""
+        return cls(
+            np.array(
+                [
+                    (
+                        _epoch_ms(d.open_time),
+                        d.open_,
+                        d.high,
+                        d.low,
+                        d.close,
+                        d.volume,
+                        _epoch_ms(d.close_time),
+                        d.quote_asset_volume,
+                        d.number_of_trades,
+                        d.taker_buy_base_asset_volume,
+                        d.taker_buy_quote_asset_volume,
+                        d.ignore,
+                    )
+                    for d in data
+                ],
+                dtype=KLINE_DTYPE,
+            )
+        )
+
+    def __len__(self) -> int:  # noqa: D105
+        return len(self.klines)
+
+    def __getitem__(self, i: int) -> Binance_data_point:
+        """Build the data point of kline ``i``."""
+        k = self.klines[i]
         return Binance_data_point(
-            UTC.localize(datetime.fromtimestamp(float(args[0]) / 1000.0)),
-            float(args[1]),
-            float(args[2]),
-            float(args[3]),
-            float(args[4]),
-            float(args[5]),
-            UTC.localize(datetime.fromtimestamp(float(args[6]) / 1000.0)),
-            float(args[7]),
-            int(args[8]),
-            float(args[9]),
-            float(args[10]),
-            int(args[11]),
+            _datetime(int(k["open_time"])),
+            float(k["open"]),
+            float(k["high"]),
+            float(k["low"]),
+            float(k["close"]),
+            float(k["volume"]),
+            _datetime(int(k["close_time"])),
+            float(k["quote_asset_volume"]),
+            int(k["number_of_trades"]),
+            float(k["taker_buy_base_asset_volume"]),
+            float(k["taker_buy_quote_asset_volume"]),
+            int(k["ignore"]),
         )
 
-    return Binance_data([binance_data_point_of_list(datum) for datum in csv_data])
+    def __iter__(self) -> Iterator[Binance_data_point]:  # noqa: D105
+        return (self[i] for i in range(len(self)))
+
+    @property
+    def open_time(self) -> np.ndarray:
+        """Open times in epoch milliseconds."""
+        return self.klines["open_time"]
+
+    @property
+    def close_time(self) -> np.ndarray:
+        """Close times in epoch milliseconds."""
+        return self.klines["close_time"]
+
+    @property
+    def open(self) -> np.ndarray:
+        """Open prices."""
+        return self.klines["open"]
+
+    @property
+    def high(self) -> np.ndarray:
+        """High prices."""
+        return self.klines["high"]
+
+    @property
+    def low(self) -> np.ndarray:
+        """Low prices."""
+        return self.klines["low"]
+
+    @property
+    def close(self) -> np.ndarray:
+        """Close prices."""
+        return self.klines["close"]
+
+    @property
+    def mid(self) -> np.ndarray:
+        """Mean of the open and close price of every kline."""
+        return (self.klines["open"] + self.klines["close"]) / 2.0
+
+    def nearest_indices(self, epoch_ms: np.ndarray) -> np.ndarray:
+        """Indices of the first klines that close at or after each of ``epoch_ms``.
+
+        Times after the last kline map to ``len(self)``.
+        """
+        return np.searchsorted(self.klines["close_time"], epoch_ms)
+
+    def find_nearest(self, target_time: datetime) -> Binance_data_point:
+        """Find the first kline that closes at or after target_time.
+
+        :raises IndexError: When all klines close before target_time.
+        """
+        i = int(self.nearest_indices(np.int64(_epoch_ms(target_time))))
+        if i == len(self):
+            raise IndexError(f"No Binance data at or after {target_time}.")
+        return self[i]
+
+
+def load_binance_data(
+    year: int, month: int, archive: Optional[KlineArchive] = None
+) -> Binance_data:
+    """Load binance data for a particular month.
+
+    The month is downloaded once and read from the local archive afterwards.
+
+    :param archive: Where to keep the data. Defaults to the archive configured by
+        ``BINANCE_ARCHIVE_DIR`` and ``BINANCE_OFFLINE``.
+    """
+    archive = archive or KlineArchive()
+    return Binance_data(archive.month("ETHUSDC", year, month))
+
+
+def load_binance_range(
+    symbols: Sequence[str],
+    start: Month,
+    end: Month,
+    interval: str = "1m",
+    archive: Optional[KlineArchive] = None,
+) -> dict[str, Binance_data]:
+    """Load the klines of several symbols from start to end, both inclusive.
+
+    :param symbols: Binance symbols, e.g. ``["ETHUSDC", "BTCUSDC"]``.
+    :param start: First (year, month) to load.
+    :param end: Last (year, month) to load.
+    :param interval: Kline interval, e.g. ``"1m"``.
+    :param archive: Where to keep the data. Defaults to the archive configured by
+        ``BINANCE_ARCHIVE_DIR`` and ``BINANCE_OFFLINE``.
+    """
+    archive = archive or KlineArchive()
+    klines = archive.load_many(symbols, start, end, interval)
+    return {symbol: Binance_data(klines[symbol]) for symbol in symbols}
 
 
 # SNIPPET 1 END
@@ -0,0 +1,113 @@
+"""CEX prices aligned to blocks, computed once before the backtest."""
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Optional
+
+import numpy as np
+from binance_data import Binance_data
+from common.block_index import block_index
+
+from dojo.common.constants import Chain
+
+
+def block_timestamps(
+    chain: Chain, block_range: tuple[int, int], stride: int = 300
+) -> np.ndarray:
+    """Timestamps in epoch milliseconds of every block in the range, both inclusive.
+
+    Only every ``stride``-th block and the last one are looked up in the local block
+    index, which fetches and keeps those it does not know yet. The blocks in between
+    are interpolated linearly, and blocks already in the index keep their exact
+    timestamps. Ethereum blocks are 12 seconds apart unless a slot is missed, so
+    interpolated times are off by a few slots at most, well within a one minute
+    kline.
+
+    :param chain: Chain the blocks are on.
+    :param block_range: First and last block.
+    :param stride: Blocks between looked up ones, 1 looks up every block.
+    """
+    first, last = block_range
+    index = block_index(chain)
+    anchors = np.union1d(np.arange(first, last + 1, stride), [last])
+    anchor_seconds = [index.block_to_timestamp(block) for block in anchors.tolist()]
+    index.flush()
+
+    blocks = np.arange(first, last + 1)
+    seconds = np.rint(np.interp(blocks, anchors, anchor_seconds)).astype(np.int64)
+    lo, hi = np.searchsorted(index.blocks, [first, last + 1])
+    known = index.samples[lo:hi]
+    seconds[known[:, 0] - first] = known[:, 1]
+    return seconds * 1000
+
+
+@dataclass
+class BlockAlignedPrices:
+    """The CEX mid price seen at every block of a backtest.
+
+    ``mid[i]`` is the mid price of the first kline closing at or after the timestamp
+    of block ``start_block + i`` plus ``lead``. It is NaN where there is no such
+    kline.
+    """
+
+    start_block: int
+    timestamps: np.ndarray
+    klines: Binance_data
+    lead: timedelta
+    mid: np.ndarray
+
+    @classmethod
+    def build(
+        cls,
+        start_block: int,
+        timestamps: np.ndarray,
+        klines: Binance_data,
+        lead: timedelta,
+    ) -> "BlockAlignedPrices":
+        """Align klines to blocks whose timestamps are already known.
+
+        :param start_block: Block of ``timestamps[0]``.
+        :param timestamps: Epoch milliseconds of consecutive blocks.
+        :param klines: The CEX data.
+        :param lead: How far ahead of the block time the CEX price is read.
+        """
+        lead_ms = int(lead / timedelta(milliseconds=1))
+        indices = klines.nearest_indices(timestamps + lead_ms)
+        found = indices < len(klines)
+        mid = np.full(len(timestamps), np.nan)
+        mid[found] = klines.mid[indices[found]]
+        return cls(start_block, timestamps, klines, lead, mid)
+
+    def with_lead(self, lead: timedelta) -> "BlockAlignedPrices":
+        """Align the same blocks and klines with another lead."""
+        return self.build(self.start_block, self.timestamps, self.klines, lead)
+
+    def mid_at(self, block: int) -> float:
+        """CEX mid price at ``block``.
+
+        :raises IndexError: When the block is outside the table or has no kline.
+        """
+        offset = block - self.start_block
+        if not 0 <= offset < len(self.mid) or np.isnan(self.mid[offset]):
+            raise IndexError(f"No aligned Binance data for block {block}.")
+        return float(self.mid[offset])
+
+
+def align_cex_prices(
+    chain: Chain,
+    block_range: tuple[int, int],
+    klines: Binance_data,
+    lead: timedelta,
+    timestamps: Optional[np.ndarray] = None,
+) -> BlockAlignedPrices:
+    """Map every block in the range to its timestamp and aligned CEX mid price.
+
+    :param chain: Chain the blocks are on.
+    :param block_range: First and last block, both inclusive.
+    :param klines: The CEX data.
+    :param lead: How far ahead of the block time the CEX price is read.
+    :param timestamps: Block timestamps in epoch milliseconds, if already known.
+        Taken from ``block_timestamps`` otherwise.
+    """
+    if timestamps is None:
+        timestamps = block_timestamps(chain, block_range)
+    return BlockAlignedPrices.build(block_range[0], timestamps, klines, lead)
@@ -0,0 +1,267 @@
+"""Local archive of Binance kline files.
+
+Monthly kline zips are downloaded once from data.binance.vision, checked against the
+SHA-256 checksum Binance publishes next to each file, and converted to a ``.npy``
+array of ``KLINE_DTYPE``. Later loads memory-map that array without hashing it
+again. In offline mode the
+archive never touches the network and only serves months that are already stored.
+
+Ranges of months are fetched concurrently over one pooled HTTP session. Downloads
+are streamed to disk and CSV rows are parsed one at a time from the zip member, so
+neither the response nor the decoded CSV is held in memory as a whole.
+
+The archive lives in ``BINANCE_ARCHIVE_DIR`` if set, and offline mode is enabled by
+setting ``BINANCE_OFFLINE=1``.
+"""
+import csv
+import hashlib
+import io
+import json
+import os
+import tempfile
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Sequence
+
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+
+BINANCE_DATA_URL = "https://data.binance.vision/data/spot/monthly/klines"
+DEFAULT_ARCHIVE_DIR = Path(
+    os.environ.get(
+        "BINANCE_ARCHIVE_DIR",
+        Path.home() / ".cache" / "dojo_examples" / "binance_klines",
+    )
+)
+
+# One row per kline. Times are epoch milliseconds.
+KLINE_DTYPE = np.dtype(
+    [
+        ("open_time", np.int64),
+        ("open", np.float64),
+        ("high", np.float64),
+        ("low", np.float64),
+        ("close", np.float64),
+        ("volume", np.float64),
+        ("close_time", np.int64),
+        ("quote_asset_volume", np.float64),
+        ("number_of_trades", np.int64),
+        ("taker_buy_base_asset_volume", np.float64),
+        ("taker_buy_quote_asset_volume", np.float64),
+        ("ignore", np.int64),
+    ]
+)
+
+Month = tuple[int, int]
+
+
+def _to_epoch_ms(timestamp: str) -> int:
+    """Binance switched its spot files from milliseconds to microseconds in 2025."""
+    value = int(timestamp)
+    return value // 1000 if value >= 10**14 else value
+
+
+def parse_klines(rows: Iterable[List[str]]) -> np.ndarray:
+    """Convert rows of a Binance kline CSV into an array of ``KLINE_DTYPE``."""
+    return np.fromiter(
+        (
+            (
+                _to_epoch_ms(row[0]),
+                float(row[1]),
+                float(row[2]),
+                float(row[3]),
+                float(row[4]),
+                float(row[5]),
+                _to_epoch_ms(row[6]),
+                float(row[7]),
+                int(row[8]),
+                float(row[9]),
+                float(row[10]),
+                int(row[11]),
+            )
+            for row in rows
+            # Some files start with a header row.
+            if row and row[0].isdigit()
+        ),
+        dtype=KLINE_DTYPE,
+    )
+
+
+def months(start: Month, end: Month) -> Iterator[Month]:
+    """Yield every (year, month) from start to end, both inclusive."""
+    year, month = start
+    while (year, month) <= end:
+        yield year, month
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+class ChecksumError(ValueError):
+    """A downloaded file does not match its published checksum."""
+
+
+class KlineArchive:
+    """Monthly Binance klines stored on the local disk.
+
+    :param root: Directory of the archive.
+    :param offline: Never download. Months that are not archived raise
+        ``FileNotFoundError``.
+    :param base_url: Where to download monthly kline zips from, e.g. a local HTTP
+        server in tests.
+    :param max_workers: Number of months fetched and converted at the same time.
+    """
+
+    def __init__(
+        self,
+        root: Path = DEFAULT_ARCHIVE_DIR,
+        offline: Optional[bool] = None,
+        base_url: str = BINANCE_DATA_URL,
+        max_workers: int = 4,
+    ) -> None:  # noqa: D107
+        self.root = Path(root)
+        if offline is None:
+            offline = os.environ.get("BINANCE_OFFLINE", "") not in ("", "0")
+        self.offline = offline
+        self.base_url = base_url.rstrip("/")
+        self.max_workers = max_workers
+        self._session: Optional[requests.Session] = None
+        self._session_lock = threading.Lock()
+
+    @property
+    def session(self) -> requests.Session:
+        """HTTP session with one pooled connection per worker."""
+        with self._session_lock:
+            if self._session is None:
+                self._session = requests.Session()
+                adapter = HTTPAdapter(pool_maxsize=self.max_workers)
+                self._session.mount("http://", adapter)
+                self._session.mount("https://", adapter)
+            return self._session
+
+    def _name(self, symbol: str, interval: str, year: int, month: int) -> str:
+        return f"{symbol}-{interval}-{year}-{month:02}"
+
+    def path(self, symbol: str, interval: str, year: int, month: int) -> Path:
+        """Path of the ``.npy`` array of one month, without its suffix."""
+        name = self._name(symbol, interval, year, month)
+        return self.root / symbol / interval / name
+
+    def _download(self, symbol: str, interval: str, year: int, month: int) -> Path:
+        """Download one monthly zip and check it against the published checksum."""
+        name = self._name(symbol, interval, year, month)
+        url = f"{self.base_url}/{symbol}/{interval}/{name}.zip"
+        zip_path = self.path(symbol, interval, year, month).with_suffix(".zip")
+        zip_path.parent.mkdir(parents=True, exist_ok=True)
+
+        checksum = self.session.get(f"{url}.CHECKSUM", timeout=30)
+        checksum.raise_for_status()
+        expected = checksum.text.split()[0]
+
+        digest = hashlib.sha256()
+        # Each download writes its own file, so concurrent downloads of the same
+        # month never interleave their chunks.
+        with tempfile.NamedTemporaryFile(
+            dir=zip_path.parent, suffix=".zip.tmp", delete=False
+        ) as f:
+            tmp_path = Path(f.name)
+        try:
+            with self.session.get(url, timeout=300, stream=True) as response:
+                response.raise_for_status()
+                with open(tmp_path, "wb") as f:
+                    for chunk in response.iter_content(chunk_size=1 << 16):
+                        digest.update(chunk)
+                        f.write(chunk)
+            if digest.hexdigest() != expected:
+                raise ChecksumError(f"{url} does not match its published checksum.")
+            os.replace(tmp_path, zip_path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+        return zip_path
+
+    def _convert(self, zip_path: Path, npy_path: Path) -> None:
+        """Convert a monthly zip into an array and record its size."""
+        with zipfile.ZipFile(zip_path) as archive:
+            with archive.open(archive.namelist()[0]) as member:
+                klines = parse_klines(csv.reader(io.TextIOWrapper(member, "utf-8")))
+        with tempfile.NamedTemporaryFile(
+            dir=npy_path.parent, suffix=".tmp.npy", delete=False
+        ) as f:
+            np.save(f, klines)
+        os.replace(f.name, npy_path)
+        meta = {
+            "source": zip_path.name,
+            "rows": len(klines),
+            "size": npy_path.stat().st_size,
+        }
+        with open(npy_path.with_suffix(".json"), "w") as f:
+            json.dump(meta, f)
+
+    def _converted(self, npy_path: Path) -> bool:
+        """Whether the array of a month was written completely.
+
+        The zip was checked when it was downloaded, so loads only compare the size
+        of the array instead of hashing it again.
+        """
+        try:
+            with open(npy_path.with_suffix(".json"), "r") as f:
+                meta = json.load(f)
+            return bool(meta.get("size") == npy_path.stat().st_size)
+        except FileNotFoundError:
+            return False
+
+    def month(
+        self, symbol: str, year: int, month: int, interval: str = "1m"
+    ) -> np.ndarray:
+        """Return the klines of one month, downloading them if needed.
+
+        :raises FileNotFoundError: In offline mode, when the month is not archived.
+        :raises ChecksumError: When a download does not match its checksum.
+        """
+        base = self.path(symbol, interval, year, month)
+        npy_path = base.with_suffix(".npy")
+        if not self._converted(npy_path):
+            zip_path = base.with_suffix(".zip")
+            if not zip_path.exists():
+                if self.offline:
+                    raise FileNotFoundError(
+                        f"{symbol} {interval} klines of {year}-{month:02} are not in "
+                        f"the archive at {self.root} and offline mode is enabled."
+                    )
+                zip_path = self._download(symbol, interval, year, month)
+            self._convert(zip_path, npy_path)
+        return np.load(npy_path, mmap_mode="r")
+
+    def load_many(
+        self,
+        symbols: Sequence[str],
+        start: Month,
+        end: Month,
+        interval: str = "1m",
+    ) -> dict[str, np.ndarray]:
+        """Return the klines of every symbol from start to end, both inclusive.
+
+        Missing months of all symbols are fetched concurrently. The months of each
+        symbol are concatenated into a single array ordered by close time.
+        """
+        jobs = [(symbol, m) for symbol in symbols for m in months(start, end)]
+        with ThreadPoolExecutor(self.max_workers) as pool:
+            arrays = list(
+                pool.map(lambda job: self.month(job[0], *job[1], interval), jobs)
+            )
+
+        klines = {}
+        for symbol in symbols:
+            parts = [a for (s, _), a in zip(jobs, arrays) if s == symbol]
+            joined = parts[0] if len(parts) == 1 else np.concatenate(parts)
+            if np.any(np.diff(joined["close_time"]) < 0):
+                joined = joined[np.argsort(joined["close_time"], kind="stable")]
+            klines[symbol] = joined
+        return klines
+
+    def load(
+        self, symbol: str, start: Month, end: Month, interval: str = "1m"
+    ) -> np.ndarray:
+        """Return the klines of every month from start to end, both inclusive."""
+        return self.load_many([symbol], start, end, interval)[symbol]
@@ -0,0 +1,276 @@
+"""Lead-lag analysis between a Uniswap pool and Binance klines, without a backtest.
+
+The DEX price series is taken from the execution prices of the swaps the market
+agent would replay, and the CEX series from the kline mid prices. Both are put on a
+one minute grid. The script then reports:
+
+- the cross-correlation of their returns at every lag, computed with one FFT, and
+- for every (lead, threshold) pair of ``TradeTowardsCentralisedExchangePolicy``, how
+  often the policy would trade and the DEX return over the following minutes.
+
+This screens ``TIME_ADVANTAGE`` and the ±threshold in seconds instead of one forked
+backtest per candidate.
+
+    python lead_lag.py --start "2024-11-21 11:00:00" --hours 24 --output lead_lag.json
+"""
+import argparse
+import json
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+import numpy as np
+
+from dojo.common.constants import Chain
+from dojo.dataloaders import UniswapV3Loader
+from dojo.dataloaders.formats import UniswapV3Event
+
+# Examples run as scripts from their own directory, the shared helpers are in the
+# repository root.
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from binance_data import Binance_data, load_binance_range  # noqa: E402
+from common.block_index import block_index  # noqa: E402
+
+MINUTE_MS = 60_000
+
+
+def _event_time_ms(event: UniswapV3Event) -> int:
+    date: Any = event.date
+    if isinstance(date, datetime):
+        # Block times are UTC, a naive datetime would be read as local time.
+        if date.tzinfo is None:
+            date = date.replace(tzinfo=timezone.utc)
+        return int(date.timestamp() * 1000)
+    return int(date)
+
+
+def swap_prices(
+    events: Iterable[UniswapV3Event], decimals0: int, decimals1: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """Execution price of every swap, in token0 per token1.
+
+    :return: Epoch milliseconds and prices, in event order.
+    """
+    times, prices = [], []
+    for event in events:
+        if event.action != "Swap":
+            continue
+        amount0, amount1 = event.quantities  # type: ignore[attr-defined]
+        if amount0 == 0 or amount1 == 0:
+            continue
+        times.append(_event_time_ms(event))
+        prices.append(abs(amount0 / 10**decimals0) / abs(amount1 / 10**decimals1))
+    return np.array(times, dtype=np.int64), np.array(prices, dtype=np.float64)
+
+
+def last_value_on_grid(
+    times: np.ndarray, values: np.ndarray, grid: np.ndarray
+) -> np.ndarray:
+    """The last value at or before each grid time, NaN before the first value."""
+    indices = np.searchsorted(times, grid, side="right") - 1
+    resampled = np.full(len(grid), np.nan)
+    known = indices >= 0
+    resampled[known] = values[indices[known]]
+    return resampled
+
+
+def cex_mid_on_grid(klines: Binance_data, grid: np.ndarray) -> np.ndarray:
+    """Mid price of the first kline closing at or after each grid time.
+
+    This is the price ``find_nearest`` hands to the policy.
+    """
+    indices = klines.nearest_indices(grid)
+    resampled = np.full(len(grid), np.nan)
+    found = indices < len(klines)
+    resampled[found] = klines.mid[indices[found]]
+    return resampled
+
+
+def cross_correlation(x: np.ndarray, y: np.ndarray, max_lag: int) -> np.ndarray:
+    """Correlation of ``x[t]`` with ``y[t + lag]`` for every lag in [-max_lag, max_lag].
+
+    All lags come from a single FFT. Like ``np.correlate`` based estimators, every
+    lag is normalised by the full series length. Both series must be free of NaNs.
+    """
+    n = len(x)
+    x = (x - x.mean()) / (x.std() * n)
+    y = (y - y.mean()) / y.std()
+    size = 1 << int(np.ceil(np.log2(2 * n)))
+    spectrum = np.conj(np.fft.rfft(x, size)) * np.fft.rfft(y, size)
+    full = np.fft.irfft(spectrum, size)
+    # Positive lags sit at the start of the circular result, negative ones at the end.
+    return np.concatenate([full[size - max_lag :], full[: max_lag + 1]])
+
+
+def threshold_stats(
+    dex: np.ndarray,
+    cex: np.ndarray,
+    leads: np.ndarray,
+    thresholds: np.ndarray,
+    horizon: int,
+) -> dict[str, np.ndarray]:
+    """Signal statistics of the CEX-lead policy for every lead and threshold.
+
+    At minute ``t`` with lead ``L`` the policy compares ``dex[t]`` with
+    ``cex[t + L]``. A relative difference below ``-threshold`` buys token1 and one
+    above ``threshold`` sells it. Each signal is scored with the DEX log return over
+    the next ``horizon`` minutes, signed in the direction of the trade.
+
+    :return: Arrays of shape (len(leads), len(thresholds)): ``signals``, the number
+        of signals, ``mean_edge``, their mean signed return, and ``hit_rate``, the
+        share of signals with a positive signed return.
+    """
+    n = len(dex)
+    forward = np.full(n, np.nan)
+    forward[: n - horizon] = np.log(dex[horizon:] / dex[: n - horizon])
+
+    shape = (len(leads), len(thresholds))
+    signals = np.zeros(shape, dtype=np.int64)
+    edge_sum = np.zeros(shape)
+    hits = np.zeros(shape, dtype=np.int64)
+    for i, lead in enumerate(leads):
+        diff = (dex[: n - lead] - cex[lead:]) / dex[: n - lead]
+        returns = forward[: n - lead]
+        usable = ~(np.isnan(diff) | np.isnan(returns))
+        diff, returns = diff[usable], returns[usable]
+
+        # Sorting once answers every threshold with a binary search and a prefix sum.
+        order = np.argsort(diff)
+        diff, returns = diff[order], returns[order]
+        edge_prefix = np.concatenate([[0.0], np.cumsum(returns)])
+        hit_prefix = np.concatenate([[0], np.cumsum(returns > 0)])
+        miss_prefix = np.concatenate([[0], np.cumsum(returns < 0)])
+
+        n_buy = np.searchsorted(diff, -thresholds, side="left")
+        first_sell = np.searchsorted(diff, thresholds, side="right")
+        signals[i] = n_buy + len(diff) - first_sell
+        edge_sum[i] = edge_prefix[n_buy] - (edge_prefix[-1] - edge_prefix[first_sell])
+        hits[i] = hit_prefix[n_buy] + (miss_prefix[-1] - miss_prefix[first_sell])
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return {
+            "signals": signals,
+            "mean_edge": edge_sum / signals,
+            "hit_rate": hits / signals,
+        }
+
+
+def lead_lag_report(
+    dex_times: np.ndarray,
+    dex_prices: np.ndarray,
+    klines: Binance_data,
+    max_lag: int = 60,
+    thresholds: Optional[np.ndarray] = None,
+    horizon: int = 15,
+    min_signals: int = 5,
+) -> dict[str, Any]:
+    """Run the full analysis on swap prices and klines of the same window.
+
+    :param dex_times: Epoch milliseconds of the swaps, ascending.
+    :param dex_prices: Swap prices in the same unit as the klines.
+    :param klines: The CEX data.
+    :param max_lag: Largest lag in minutes, in both directions.
+    :param thresholds: Relative price differences to test. Defaults to 0.1% to 5%.
+    :param horizon: Minutes over which signals are scored.
+    :param min_signals: Fewest signals a (lead, threshold) pair needs to be ranked.
+    """
+    if thresholds is None:
+        thresholds = np.round(np.arange(0.001, 0.0501, 0.001), 6)
+    start = dex_times[0] - dex_times[0] % MINUTE_MS + MINUTE_MS
+    grid = np.arange(start, dex_times[-1] + 1, MINUTE_MS, dtype=np.int64)
+    dex = last_value_on_grid(dex_times, dex_prices, grid)
+    cex = cex_mid_on_grid(klines, grid)
+
+    usable = ~(np.isnan(dex) | np.isnan(cex))
+    dex_returns = np.diff(np.log(dex[usable]))
+    cex_returns = np.diff(np.log(cex[usable]))
+    lags = np.arange(-max_lag, max_lag + 1)
+    # A peak at a positive lag means that DEX returns follow CEX returns.
+    correlation = cross_correlation(cex_returns, dex_returns, max_lag)
+
+    leads = np.arange(0, max_lag + 1)
+    stats = threshold_stats(dex, cex, leads, thresholds, horizon)
+    # Only rank combinations with enough signals to say anything.
+    ranked = np.where(stats["signals"] >= min_signals, stats["mean_edge"], np.nan)
+    best: Optional[dict[str, Any]] = None
+    if not np.all(np.isnan(ranked)):
+        i, j = np.unravel_index(np.nanargmax(ranked), ranked.shape)
+        best = {
+            "lead_minutes": int(leads[i]),
+            "threshold": float(thresholds[j]),
+            "signals": int(stats["signals"][i, j]),
+            "mean_edge": float(stats["mean_edge"][i, j]),
+            "hit_rate": float(stats["hit_rate"][i, j]),
+        }
+    return {
+        "minutes": len(grid),
+        "swaps": len(dex_times),
+        "horizon_minutes": horizon,
+        "lags_minutes": lags.tolist(),
+        "return_correlation": correlation.tolist(),
+        "peak_correlation_lag": int(lags[np.argmax(correlation)]),
+        "leads_minutes": leads.tolist(),
+        "thresholds": thresholds.tolist(),
+        "signals": stats["signals"].tolist(),
+        "mean_edge": np.nan_to_num(stats["mean_edge"]).tolist(),
+        "hit_rate": np.nan_to_num(stats["hit_rate"]).tolist(),
+        "best": best,
+    }
+
+
+def main() -> None:
+    """Load a window of swaps and klines and print the lead-lag report."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--start", default="2024-11-21 11:00:00")
+    parser.add_argument("--hours", type=float, default=24.0)
+    parser.add_argument("--pool", default="USDC/WETH-0.05")
+    parser.add_argument("--decimals0", type=int, default=6)
+    parser.add_argument("--decimals1", type=int, default=18)
+    parser.add_argument("--symbol", default="ETHUSDC")
+    parser.add_argument("--max-lag", type=int, default=60)
+    parser.add_argument("--horizon", type=int, default=15)
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args()
+
+    chain = Chain.ETHEREUM
+    start = datetime.fromisoformat(args.start)
+    end = start + timedelta(hours=args.hours)
+    # Both ends are answered from the local block index on reruns.
+    index = block_index(chain)
+    block_range = (
+        index.time_to_block(args.start),
+        index.time_to_block(end.strftime("%Y-%m-%d %H:%M:%S")),
+    )
+    events = UniswapV3Loader()._load_data(
+        chain, [args.pool], *block_range, subset=["Swap"]
+    )
+    dex_times, dex_prices = swap_prices(events, args.decimals0, args.decimals1)
+
+    klines = load_binance_range(
+        [args.symbol], (start.year, start.month), (end.year, end.month)
+    )[args.symbol]
+
+    report = lead_lag_report(
+        dex_times, dex_prices, klines, max_lag=args.max_lag, horizon=args.horizon
+    )
+    if args.output is not None:
+        args.output.write_text(json.dumps(report) + "\n")
+    best = report["best"]
+    print(
+        f"{report['swaps']:,} swaps over {report['minutes']:,} minutes. "
+        f"DEX returns correlate most with CEX returns from "
+        f"{report['peak_correlation_lag']} min earlier."
+    )
+    if best is None:
+        print("Too few signals at every lead and threshold.")
+        return
+    print(
+        f"Best lead {best['lead_minutes']} min at threshold {best['threshold']:.3f}: "
+        f"{best['signals']} signals, mean edge {best['mean_edge']:.5f}, "
+        f"hit rate {best['hit_rate']:.2f} over {args.horizon} min."
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -2,8 +2,10 @@
 from datetime import timedelta
 from decimal import Decimal
 from enum import Enum
+from typing import Optional
 
 from binance_data import Binance_data
+from cex_alignment import BlockAlignedPrices
 
 from dojo.actions.uniswapV3 import BaseUniswapV3Action, UniswapV3Trade
 from dojo.environments.uniswapV3 import UniswapV3Observation
@@ -23,6 +25,9 @@ class TradeTowardsCentralisedExchangePolicy(UniswapV3Policy):
     """Arbitrage trading policy for a UniswapV3Env with two pools.
 
     :param agent: The agent which is using this policy.
+    :param aligned_prices: CEX prices aligned to the blocks of the backtest with
+        ``TIME_ADVANTAGE`` as lead, see ``cex_alignment.align_cex_prices``. Without
+        them, the block time is fetched and the klines are searched on every block.
     """
 
     PERCENTAGE_THRESHOLD = 0.01
@@ -31,9 +36,14 @@ class TradeTowardsCentralisedExchangePolicy(UniswapV3Policy):
     FREEZE_BLOCKS = 200
 
     # SNIPPET 1 START
-    def __init__(self, binance_data: Binance_data) -> None:  # noqa: D107
+    def __init__(
+        self,
+        binance_data: Binance_data,
+        aligned_prices: Optional[BlockAlignedPrices] = None,
+    ) -> None:  # noqa: D107
         super().__init__()
         self.binance_data = binance_data
+        self.aligned_prices = aligned_prices
         self.block_last_trade: int = 0
         self.state = State.NOT_INVESTED
 
@@ -50,12 +60,17 @@ class TradeTowardsCentralisedExchangePolicy(UniswapV3Policy):
         token0, token1 = obs.pool_tokens(pool)
         dex_usdc_per_eth = float(obs.price(token1, token0, pool))
 
-        date = obs.backend.block_to_datetime(block) + self.TIME_ADVANTAGE
-        # SNIPPET 2 START
-        # inside [ def predict(self, obs: UniswapV3Observation -> List[UniswapV3Action]: ]
-        binance_data_point = self.binance_data.find_nearest(date)
-        cex_usdc_per_eth = (binance_data_point.open_ + binance_data_point.close) / 2.0
-        # SNIPPET 2 END
+        if self.aligned_prices is not None:
+            cex_usdc_per_eth = self.aligned_prices.mid_at(block)
+        else:
+            date = obs.backend.block_to_datetime(block) + self.TIME_ADVANTAGE
+            # SNIPPET 2 START
+            # inside [ def predict(self, obs: UniswapV3Observation -> List[UniswapV3Action]: ]
+            binance_data_point = self.binance_data.find_nearest(date)
+            cex_usdc_per_eth = (
+                binance_data_point.open_ + binance_data_point.close
+            ) / 2.0
+            # SNIPPET 2 END
 
         diff = (dex_usdc_per_eth - cex_usdc_per_eth) / dex_usdc_per_eth
 
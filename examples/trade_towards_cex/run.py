@@ -1,18 +1,23 @@
 """Run strategy against binance data."""
-
+import sys
 from decimal import Decimal
+from pathlib import Path
 from typing import Any, Optional
 
-from binance_data import load_binance_data
-from policy import TradeTowardsCentralisedExchangePolicy
-
 from dojo.agents.uniswapV3 import TotalWealthAgent
-from dojo.common import time_to_block
 from dojo.common.constants import Chain
 from dojo.environments import UniswapV3Env
 from dojo.market_agents.uniswapV3 import HistoricReplayAgent
 from dojo.runners import backtest_run
 
+# Examples run as scripts from their own directory, the shared helpers are in the
+# repository root.
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from binance_data import load_binance_data  # noqa: E402
+from cex_alignment import align_cex_prices  # noqa: E402
+from common.block_index import time_to_block  # noqa: E402
+from policy import TradeTowardsCentralisedExchangePolicy  # noqa: E402
+
 
 def main(
     *,
@@ -29,16 +34,23 @@ def main(
     start_day = 21
     start_time = f"{year}-{month:02}-{start_day:02} 11:00:00"
     chain = Chain.ETHEREUM
-    block_range = (
-        time_to_block(start_time, chain),
-        time_to_block(start_time, chain) + num_sim_blocks,
-    )
+    start_block = time_to_block(start_time, chain)
+    block_range = (start_block, start_block + num_sim_blocks)
 
     # Agents
     market_agent = HistoricReplayAgent(
         chain=chain, pools=pools, block_range=block_range
     )
 
+    binance_data = load_binance_data(year, month)
+    # Look up the CEX price of every block once, before the backtest starts.
+    aligned_prices = align_cex_prices(
+        chain,
+        block_range,
+        binance_data,
+        lead=TradeTowardsCentralisedExchangePolicy.TIME_ADVANTAGE,
+    )
+
     # SNIPPET 1 START
     cex_directional_agent = TotalWealthAgent(
         initial_portfolio={
@@ -49,7 +61,7 @@ def main(
         name="CEX Directional Agent",
         unit_token="USDC",
         policy=TradeTowardsCentralisedExchangePolicy(
-            binance_data=load_binance_data(year, month)
+            binance_data=binance_data, aligned_prices=aligned_prices
         ),
     )
     # SNIPPET 1 END
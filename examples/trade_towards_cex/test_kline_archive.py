@@ -0,0 +1,108 @@
+"""Tests of the kline archive against a local HTTP stand-in for Binance."""
+import hashlib
+import threading
+import zipfile
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Iterator
+
+import numpy as np
+import pytest
+from kline_archive import ChecksumError, KlineArchive
+
+SYMBOL, INTERVAL = "ETHUSDT", "1m"
+MINUTE_MS = 60_000
+
+
+def _month_csv(open_ms: int, rows: int, scale: int = 1, header: bool = False) -> str:
+    lines = ["open_time,open,high,low,close,volume,close_time,..."] if header else []
+    for i in range(rows):
+        open_time = open_ms + i * MINUTE_MS
+        close_time = open_time + MINUTE_MS - 1
+        lines.append(
+            f"{open_time * scale},3000.0,3001.0,2999.0,{3000 + i}.5,1.5,"
+            f"{close_time * scale},4500.0,{i},0.5,1500.0,0"
+        )
+    return "\n".join(lines) + "\n"
+
+
+def _publish(root: Path, year: int, month: int, csv: str, checksum: str = "") -> None:
+    """Write a monthly zip and its checksum file like data.binance.vision."""
+    name = f"{SYMBOL}-{INTERVAL}-{year}-{month:02}"
+    directory = root / SYMBOL / INTERVAL
+    directory.mkdir(parents=True, exist_ok=True)
+    zip_path = directory / f"{name}.zip"
+    with zipfile.ZipFile(zip_path, "w") as archive:
+        archive.writestr(f"{name}.csv", csv)
+    digest = checksum or hashlib.sha256(zip_path.read_bytes()).hexdigest()
+    (directory / f"{name}.zip.CHECKSUM").write_text(f"{digest}  {name}.zip\n")
+
+
+class _Handler(SimpleHTTPRequestHandler):
+    requests: list[str] = []
+
+    def do_GET(self) -> None:
+        _Handler.requests.append(self.path)
+        super().do_GET()
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+@pytest.fixture
+def server(tmp_path: Path) -> Iterator[tuple[str, Path]]:
+    """A local HTTP server serving the files under ``tmp_path / "remote"``."""
+    remote = tmp_path / "remote"
+    remote.mkdir()
+    _Handler.requests = []
+    httpd = ThreadingHTTPServer(
+        ("127.0.0.1", 0), partial(_Handler, directory=str(remote))
+    )
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}", remote
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_load_many_concatenates_months(
+    server: tuple[str, Path], tmp_path: Path
+) -> None:
+    url, remote = server
+    december, january = 1733011200000, 1735689600000
+    _publish(remote, 2024, 12, _month_csv(december, 3, header=True))
+    # Binance switched to microsecond timestamps in 2025.
+    _publish(remote, 2025, 1, _month_csv(january, 2, scale=1000))
+
+    archive = KlineArchive(tmp_path / "local", base_url=url, max_workers=2)
+    klines = archive.load_many([SYMBOL], (2024, 12), (2025, 1))[SYMBOL]
+
+    assert len(klines) == 5
+    assert klines["open_time"][0] == december
+    assert klines["open_time"][3] == january
+    assert np.all(np.diff(klines["close_time"]) > 0)
+    assert klines["close"][4] == 3001.5
+
+    # Archived months are served offline without touching the server.
+    served = len(_Handler.requests)
+    offline = KlineArchive(tmp_path / "local", offline=True)
+    cached = offline.load(SYMBOL, (2024, 12), (2025, 1))
+    np.testing.assert_array_equal(cached, klines)
+    assert len(_Handler.requests) == served
+
+
+def test_offline_mode_raises_for_missing_months(tmp_path: Path) -> None:
+    archive = KlineArchive(tmp_path, offline=True)
+    with pytest.raises(FileNotFoundError):
+        archive.month(SYMBOL, 2024, 12)
+
+
+def test_checksum_mismatch(server: tuple[str, Path], tmp_path: Path) -> None:
+    url, remote = server
+    _publish(remote, 2024, 12, _month_csv(1733011200000, 3), checksum="0" * 64)
+
+    archive = KlineArchive(tmp_path / "local", base_url=url)
+    with pytest.raises(ChecksumError):
+        archive.month(SYMBOL, 2024, 12)
+    assert not list((tmp_path / "local").rglob("*.zip*"))
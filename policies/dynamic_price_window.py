@@ -1,7 +1,12 @@
 """Dynamic price window policy."""
 import logging
+import math
 
+from policies.indicators import SMA
+
+from dojo.actions.uniswapV3 import BaseUniswapV3Action
 from dojo.agents import UniswapV3Agent
+from dojo.observations.uniswapV3 import UniswapV3Observation
 
 from .price_window import PriceWindowPolicy
 
@@ -10,17 +15,41 @@ logging.basicConfig(format="%(asctime)s - %(message)s", level=logging.INFO)
 
 # SNIPPET dynamic_price_window START
 class DynamicPriceWindowPolicy(PriceWindowPolicy):
-    """Policy for Dynamic Moving Average Price Window strategy."""
+    """Policy for Dynamic Moving Average Price Window strategy.
+
+    The window keeps the width of the initial limits and is centred on the average
+    price of the last ``center_window`` blocks once that many have been seen.
+
+    :param lower_limit: Initial lower limit of the window.
+    :param upper_limit: Initial upper limit of the window.
+    :param center_window: Number of blocks averaged to centre the window.
+    """
 
     # upper and lower limit are now parameters of the policy
     def __init__(
-        self, agent: UniswapV3Agent, lower_limit: float, upper_limit: float
+        self,
+        agent: UniswapV3Agent,
+        lower_limit: float,
+        upper_limit: float,
+        center_window: int = 100,
     ) -> None:  # noqa: D107
         super().__init__(lower_limit=lower_limit, upper_limit=upper_limit)
-        self.old_price: float = 0.0
         self.spread: float = self.upper_limit - self.lower_limit
         self.center: float = (self.upper_limit + self.lower_limit) / 2
-        self.returns: list[float] = []
+        self.center_average = SMA(center_window)
+
+    def predict(self, obs: UniswapV3Observation) -> list[BaseUniswapV3Action]:
+        """Move the window to the average price, then trade against it."""
+        pool = obs.pools[0]
+        x_token, y_token = obs.pool_tokens(pool)
+        center = self.center_average.update(
+            float(obs.price(token=x_token, unit=y_token, pool=pool))
+        )
+        if not math.isnan(center):
+            self.center = center
+            self.lower_limit = center - self.spread / 2
+            self.upper_limit = center + self.spread / 2
+        return super().predict(obs)
 
 
 # SNIPPET dynamic_price_window END
@@ -0,0 +1,497 @@
+"""Technical indicators for policies.
+
+Every indicator works in two modes built on the same definition:
+
+- ``update`` adds the next observation and returns the current value in O(1). This
+  is what a policy calls once per block in ``predict``.
+- ``batch`` computes the whole series over NumPy arrays in one call, without
+  touching the streaming state. Use it to precompute signals offline or to check a
+  parameter choice before a backtest.
+
+Feeding the same data to both gives the same values up to floating point rounding.
+Values are NaN until an indicator has seen enough data.
+
+    sma = SMA(25)
+    for price in prices:
+        value = sma.update(price)
+    assert np.isclose(value, SMA(25).batch(prices)[-1])
+"""
+import math
+from abc import ABC, abstractmethod
+from typing import Any, NamedTuple, Optional
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+class _RollingWindow:
+    """Mean and variance of the last ``size`` values in a ring buffer.
+
+    Values replacing the oldest one update the mean and the sum of squared
+    deviations with Welford's method. Both are recomputed exactly each time the ring
+    wraps around, so rounding errors cannot build up.
+    """
+
+    def __init__(self, size: int) -> None:  # noqa: D107
+        self.size = size
+        self.clear()
+
+    def clear(self) -> None:
+        self._values: list[float] = [0.0] * self.size
+        self._next = 0
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def append(self, value: float) -> None:
+        if self.count < self.size:
+            self.count += 1
+            delta = value - self.mean
+            self.mean += delta / self.count
+            self._m2 += delta * (value - self.mean)
+        else:
+            old = self._values[self._next]
+            old_mean = self.mean
+            self.mean += (value - old) / self.size
+            self._m2 += (value - old) * (value - self.mean + old - old_mean)
+        self._values[self._next] = value
+        self._next += 1
+        if self._next == self.size:
+            self._next = 0
+            self.mean = math.fsum(self._values) / self.size
+            self._m2 = math.fsum((v - self.mean) ** 2 for v in self._values)
+
+    @property
+    def full(self) -> bool:
+        return self.count == self.size
+
+    @property
+    def std(self) -> float:
+        """Population standard deviation."""
+        return math.sqrt(max(self._m2, 0.0) / self.count)
+
+
+def _check_window(window: int, minimum: int = 1) -> None:
+    if window < minimum:
+        raise ValueError(f"Window must be at least {minimum}, got {window}.")
+
+
+def _rolling_sum(values: np.ndarray, window: int) -> np.ndarray:
+    """Sums of ``values[i - window + 1 : i + 1]``, NaN where the window is partial."""
+    sums = np.full(len(values), np.nan)
+    if len(values) >= window:
+        cumulative = np.concatenate([[0.0], np.cumsum(values, dtype=np.float64)])
+        sums[window - 1 :] = cumulative[window:] - cumulative[:-window]
+    return sums
+
+
+def _recurrence(start: float, inputs: np.ndarray, alpha: float) -> np.ndarray:
+    """``y[0] = start``, ``y[i] = y[i - 1] + alpha * (inputs[i - 1] - y[i - 1])``.
+
+    Exponential smoothing is inherently sequential, so this runs one float loop
+    instead of NumPy calls per element.
+    """
+    out = [start]
+    value = start
+    for x in inputs.tolist():
+        value += alpha * (x - value)
+        out.append(value)
+    return np.array(out)
+
+
+class Indicator(ABC):
+    """An indicator of one price series."""
+
+    @abstractmethod
+    def update(self, price: float) -> Any:
+        """Add the next price and return the current value."""
+
+    @abstractmethod
+    def batch(self, prices: np.ndarray) -> Any:
+        """Compute the value after every price of ``prices``."""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Forget all prices seen by ``update``."""
+
+
+class SMA(Indicator):
+    """Simple moving average of the last ``window`` prices.
+
+    :param window: Number of prices averaged.
+    """
+
+    def __init__(self, window: int) -> None:  # noqa: D107
+        _check_window(window)
+        self.window = window
+        self._rolling = _RollingWindow(window)
+
+    def clear(self) -> None:
+        """Forget all prices seen by ``update``."""
+        self._rolling.clear()
+
+    def update(self, price: float) -> float:
+        """Add the next price and return the average."""
+        self._rolling.append(price)
+        return self._rolling.mean if self._rolling.full else math.nan
+
+    @property
+    def count(self) -> int:
+        """Number of prices in the window."""
+        return self._rolling.count
+
+    @property
+    def value(self) -> float:
+        """Average of the prices in the window, also before it is full.
+
+        NaN before the first price.
+        """
+        return self._rolling.mean if self._rolling.count else math.nan
+
+    def batch(self, prices: np.ndarray) -> np.ndarray:
+        """Average after every price."""
+        prices = np.asarray(prices, dtype=np.float64)
+        if not len(prices):
+            return np.empty(0)
+        # Centring keeps the cumulative sums small and accurate.
+        centre = prices[0]
+        return _rolling_sum(prices - centre, self.window) / self.window + centre
+
+
+class EMA(Indicator):
+    """Exponential moving average with a span of ``window`` prices.
+
+    The smoothing factor is ``2 / (window + 1)`` and the average starts at the first
+    price. It is reported once ``window`` prices have been seen.
+
+    :param window: Span of the average.
+    """
+
+    def __init__(self, window: int) -> None:  # noqa: D107
+        _check_window(window)
+        self.window = window
+        self.alpha = 2 / (window + 1)
+        self.clear()
+
+    def clear(self) -> None:
+        """Forget all prices seen by ``update``."""
+        self._count = 0
+        self._value = math.nan
+
+    def update(self, price: float) -> float:
+        """Add the next price and return the average."""
+        if self._count == 0:
+            self._value = price
+        else:
+            self._value += self.alpha * (price - self._value)
+        self._count = min(self._count + 1, self.window)
+        return self._value if self._count == self.window else math.nan
+
+    @property
+    def count(self) -> int:
+        """Number of prices seen, up to ``window``."""
+        return self._count
+
+    @property
+    def value(self) -> float:
+        """The average, also before ``window`` prices were seen.
+
+        NaN before the first price.
+        """
+        return self._value
+
+    def batch(self, prices: np.ndarray) -> np.ndarray:
+        """Average after every price."""
+        prices = np.asarray(prices, dtype=np.float64)
+        if not len(prices):
+            return np.empty(0)
+        values = _recurrence(prices[0], prices[1:], self.alpha)
+        values[: self.window - 1] = np.nan
+        return values
+
+
+class RSI(Indicator):
+    """Relative strength index.
+
+    By default the index covers the last ``period`` prices, and the average gain and
+    loss are the means of the rising and of the falling price changes in that
+    window, as in the RSI example. With ``wilder=True`` they are Wilder's smoothed
+    averages over ``period`` changes, seeded with the mean of the first ``period``.
+
+    :param period: Number of prices in the window, or Wilder's smoothing length.
+    :param wilder: Use Wilder's smoothing.
+    """
+
+    def __init__(self, period: int = 14, wilder: bool = False) -> None:  # noqa: D107
+        _check_window(period, 2)
+        self.period = period
+        self.wilder = wilder
+        self.clear()
+
+    def clear(self) -> None:
+        """Forget all prices seen by ``update``."""
+        self._last_price: Optional[float] = None
+        self._changes: list[float] = [0.0] * (self.period - 1)
+        self._next = 0
+        self._seen = 0
+        self._gain = 0.0
+        self._loss = 0.0
+        self._gain_count = 0
+        self._loss_count = 0
+
+    @staticmethod
+    def _index(gain: float, loss: float) -> float:
+        if loss == 0:
+            return 100.0
+        return 100.0 - 100.0 / (1.0 + gain / loss)
+
+    def _count(self, change: float, sign: int) -> None:
+        if change > 0:
+            self._gain += sign * change
+            self._gain_count += sign
+        elif change < 0:
+            self._loss -= sign * change
+            self._loss_count += sign
+
+    def _update_window(self, change: float) -> float:
+        if self._seen == self.period - 1:
+            self._count(self._changes[self._next], -1)
+        else:
+            self._seen += 1
+        self._changes[self._next] = change
+        self._next = (self._next + 1) % (self.period - 1)
+        self._count(change, 1)
+        if self._seen < self.period - 1:
+            return math.nan
+        # Recover from rounding once a side has emptied.
+        if self._gain_count == 0:
+            self._gain = 0.0
+            return 100.0 if self._loss_count == 0 else 0.0
+        if self._loss_count == 0:
+            self._loss = 0.0
+            return 100.0
+        return self._index(
+            self._gain / self._gain_count, self._loss / self._loss_count
+        )
+
+    def _update_wilder(self, change: float) -> float:
+        gain, loss = max(change, 0.0), max(-change, 0.0)
+        if self._seen < self.period:
+            self._seen += 1
+            self._gain += gain / self.period
+            self._loss += loss / self.period
+            if self._seen < self.period:
+                return math.nan
+        else:
+            self._gain += (gain - self._gain) / self.period
+            self._loss += (loss - self._loss) / self.period
+        return self._index(self._gain, self._loss)
+
+    def update(self, price: float) -> float:
+        """Add the next price and return the index."""
+        value = math.nan
+        if self._last_price is not None:
+            change = price - self._last_price
+            if self.wilder:
+                value = self._update_wilder(change)
+            else:
+                value = self._update_window(change)
+        self._last_price = price
+        return value
+
+    def batch(self, prices: np.ndarray) -> np.ndarray:
+        """Index after every price."""
+        prices = np.asarray(prices, dtype=np.float64)
+        changes = np.diff(prices)
+        gains = np.maximum(changes, 0.0)
+        losses = np.maximum(-changes, 0.0)
+        values = np.full(len(prices), np.nan)
+        if self.wilder:
+            if len(changes) < self.period:
+                return values
+            alpha = 1 / self.period
+            gain = _recurrence(gains[: self.period].mean(), gains[self.period :], alpha)
+            loss = _recurrence(
+                losses[: self.period].mean(), losses[self.period :], alpha
+            )
+            with np.errstate(divide="ignore", invalid="ignore"):
+                values[self.period :] = np.where(
+                    loss == 0, 100.0, 100.0 - 100.0 / (1.0 + gain / loss)
+                )
+            return values
+
+        window = self.period - 1
+        gain_sum = _rolling_sum(gains, window)[window - 1 :]
+        loss_sum = _rolling_sum(losses, window)[window - 1 :]
+        gain_count = _rolling_sum((changes > 0).astype(np.float64), window)[
+            window - 1 :
+        ]
+        loss_count = _rolling_sum((changes < 0).astype(np.float64), window)[
+            window - 1 :
+        ]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rs = (gain_sum / gain_count) / (loss_sum / loss_count)
+            values[window:] = np.select(
+                [loss_count == 0, gain_count == 0],
+                [100.0, 0.0],
+                100.0 - 100.0 / (1.0 + rs),
+            )
+        return values
+
+
+class Bands(NamedTuple):
+    """Bollinger bands, as floats or as arrays."""
+
+    middle: Any
+    upper: Any
+    lower: Any
+
+
+class BollingerBands(Indicator):
+    """Simple moving average of ``window`` prices, ± ``num_std`` standard deviations.
+
+    The standard deviation is the population standard deviation of the window.
+
+    :param window: Number of prices in the window.
+    :param num_std: Width of the bands in standard deviations.
+    """
+
+    def __init__(self, window: int = 20, num_std: float = 2.0) -> None:  # noqa: D107
+        _check_window(window)
+        self.window = window
+        self.num_std = num_std
+        self._rolling = _RollingWindow(window)
+
+    def clear(self) -> None:
+        """Forget all prices seen by ``update``."""
+        self._rolling.clear()
+
+    def update(self, price: float) -> Bands:
+        """Add the next price and return the bands."""
+        self._rolling.append(price)
+        if not self._rolling.full:
+            return Bands(math.nan, math.nan, math.nan)
+        mean, width = self._rolling.mean, self.num_std * self._rolling.std
+        return Bands(mean, mean + width, mean - width)
+
+    def batch(self, prices: np.ndarray) -> Bands:
+        """Bands after every price, as three arrays."""
+        prices = np.asarray(prices, dtype=np.float64)
+        middle = np.full(len(prices), np.nan)
+        width = np.full(len(prices), np.nan)
+        if len(prices) >= self.window:
+            windows = sliding_window_view(prices, self.window)
+            middle[self.window - 1 :] = windows.mean(axis=1)
+            width[self.window - 1 :] = self.num_std * windows.std(axis=1)
+        return Bands(middle, middle + width, middle - width)
+
+
+class RealizedVolatility(Indicator):
+    """Standard deviation of the last ``window`` log returns.
+
+    :param window: Number of returns in the window.
+    :param periods_per_year: Scale the result by its square root to annualise it,
+        e.g. 2_628_000 for 12 second blocks. Per period when omitted.
+    """
+
+    def __init__(  # noqa: D107
+        self, window: int, periods_per_year: Optional[float] = None
+    ) -> None:
+        _check_window(window, 2)
+        self.window = window
+        self.scale = math.sqrt(periods_per_year) if periods_per_year else 1.0
+        self._rolling = _RollingWindow(window)
+        self._last_price: Optional[float] = None
+
+    def clear(self) -> None:
+        """Forget all prices seen by ``update``."""
+        self._rolling.clear()
+        self._last_price = None
+
+    def update(self, price: float) -> float:
+        """Add the next price and return the volatility."""
+        if self._last_price is not None:
+            self._rolling.append(math.log(price / self._last_price))
+        self._last_price = price
+        return self._rolling.std * self.scale if self._rolling.full else math.nan
+
+    def batch(self, prices: np.ndarray) -> np.ndarray:
+        """Volatility after every price."""
+        prices = np.asarray(prices, dtype=np.float64)
+        returns = np.diff(np.log(prices))
+        values = np.full(len(prices), np.nan)
+        if len(returns) >= self.window:
+            windows = sliding_window_view(returns, self.window)
+            values[self.window :] = windows.std(axis=1) * self.scale
+        return values
+
+
+class ATR(Indicator):
+    """Average true range with Wilder's smoothing over ``period`` ranges.
+
+    The true range of a bar is the largest of its high-low range and the distances
+    of its high and low from the previous close. The first bar has no previous close
+    and contributes its high-low range. Without highs and lows, as with one pool
+    price per block, the true range is the absolute price change and the first
+    price contributes zero.
+
+    :param period: Smoothing length.
+    """
+
+    def __init__(self, period: int = 14) -> None:  # noqa: D107
+        _check_window(period)
+        self.period = period
+        self.clear()
+
+    def clear(self) -> None:
+        """Forget all prices seen by ``update``."""
+        self._last_close: Optional[float] = None
+        self._seen = 0
+        self._value = 0.0
+
+    def update(
+        self, price: float, high: Optional[float] = None, low: Optional[float] = None
+    ) -> float:
+        """Add the next close and optional high and low, and return the ATR."""
+        high = price if high is None else high
+        low = price if low is None else low
+        true_range = high - low
+        if self._last_close is not None:
+            true_range = max(
+                true_range, abs(high - self._last_close), abs(low - self._last_close)
+            )
+        self._last_close = price
+        if self._seen < self.period:
+            self._seen += 1
+            self._value += true_range / self.period
+            return self._value if self._seen == self.period else math.nan
+        self._value += (true_range - self._value) / self.period
+        return self._value
+
+    def batch(
+        self,
+        prices: np.ndarray,
+        high: Optional[np.ndarray] = None,
+        low: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """ATR after every close, with optional highs and lows of the same length."""
+        close = np.asarray(prices, dtype=np.float64)
+        high = close if high is None else np.asarray(high, dtype=np.float64)
+        low = close if low is None else np.asarray(low, dtype=np.float64)
+        true_range = high - low
+        if len(close) > 1:
+            previous = close[:-1]
+            true_range[1:] = np.maximum.reduce(
+                [
+                    true_range[1:],
+                    np.abs(high[1:] - previous),
+                    np.abs(low[1:] - previous),
+                ]
+            )
+        values = np.full(len(close), np.nan)
+        if len(close) >= self.period:
+            seed = true_range[: self.period].mean()
+            values[self.period - 1 :] = _recurrence(
+                seed, true_range[self.period :], 1 / self.period
+            )
+        return values
@@ -1,6 +1,8 @@
 """Passive LP policy."""
 from decimal import Decimal
 
+from policies.requirements import Requirement, price
+
 from dojo.actions.uniswapV3 import BaseUniswapV3Action, UniswapV3Quote, UniswapV3Trade
 from dojo.observations import uniswapV3
 from dojo.observations.uniswapV3 import UniswapV3Observation
@@ -76,6 +78,14 @@ class PassiveConcentratedLP(UniswapV3Policy):
         self.has_invested = True
         return [provide_action]
 
+    def data_requirements(self, obs: UniswapV3Observation) -> list[Requirement]:
+        """Data ``predict`` reads in the current block, prefetched by the env."""
+        if self.has_traded and self.has_invested:
+            return []
+        pool = obs.pools[0]
+        token0, token1 = obs.pool_tokens(pool)
+        return [price(token0, token1, pool)]
+
     def predict(self, obs: UniswapV3Observation) -> list[BaseUniswapV3Action]:
         """Derive actions from observations."""
         if not self.has_traded:
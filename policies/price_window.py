@@ -2,6 +2,8 @@
 import logging
 from decimal import Decimal
 
+from policies.indicators import SMA
+
 from dojo.actions.uniswapV3 import BaseUniswapV3Action, UniswapV3Trade
 from dojo.observations.uniswapV3 import UniswapV3Observation
 from dojo.policies import UniswapV3Policy
@@ -11,12 +13,20 @@ logging.basicConfig(format="%(asctime)s - %(message)s", level=logging.INFO)
 
 # SNIPPET price_window START
 class PriceWindowPolicy(UniswapV3Policy):
-    """Policy for Moving Average Price Window strategy."""
+    """Policy for Moving Average Price Window strategy.
+
+    :param lower_limit: Buy token x while its average price is below this.
+    :param upper_limit: Sell token x while its average price is above this.
+    :param window: Number of blocks averaged, 1 trades on the spot price.
+    """
 
-    def __init__(self, lower_limit: float, upper_limit: float) -> None:  # noqa: D107
+    def __init__(  # noqa: D107
+        self, lower_limit: float, upper_limit: float, window: int = 1
+    ) -> None:
         super().__init__()
         self.upper_limit = upper_limit
         self.lower_limit = lower_limit
+        self.moving_average = SMA(window)
 
     # derive actions from observations
     def predict(self, obs: UniswapV3Observation) -> list[BaseUniswapV3Action]:
@@ -24,12 +34,14 @@ class PriceWindowPolicy(UniswapV3Policy):
         pool = obs.pools[0]
         x_token, y_token = obs.pool_tokens(pool)
         spot_price = obs.price(token=x_token, unit=y_token, pool=pool)
+        # NaN until the window is full, which compares false against both limits.
+        price = self.moving_average.update(float(spot_price))
 
         x_quantity, y_quantity = self.agent.quantity(x_token), self.agent.quantity(
             y_token
         )
 
-        if spot_price > self.upper_limit and y_quantity > Decimal("0"):
+        if price > self.upper_limit and y_quantity > Decimal("0"):
             action = UniswapV3Trade(
                 agent=self.agent,
                 pool=pool,
@@ -37,7 +49,7 @@ class PriceWindowPolicy(UniswapV3Policy):
             )
             return [action]
 
-        if spot_price < self.lower_limit and x_quantity > Decimal("0"):
+        if price < self.lower_limit and x_quantity > Decimal("0"):
             action = UniswapV3Trade(
                 agent=self.agent,
                 pool=pool,
@@ -0,0 +1,92 @@
+"""Per-block data requirements a policy can declare.
+
+Instead of pulling observation fields one call at a time inside ``predict``, a
+policy can declare up front what it reads each block:
+
+    class MyPolicy(UniswapV3Policy):
+        def data_requirements(self, obs):
+            token0, token1 = obs.pool_tokens(obs.pools[0])
+            return [price(token0, token1, obs.pools[0]), slot0(obs.pools[0])]
+
+        def predict(self, obs):
+            spot = obs.snapshot[price(*obs.pool_tokens(obs.pools[0]), obs.pools[0])]
+
+Environments that prefetch requirements, see ``environments.requirements``, read
+them once per block for all agents and publish the values as ``obs.snapshot``.
+"""
+from dataclasses import dataclass
+from typing import Any, Iterator, Mapping, Optional
+
+from dojo.observations import BaseObservation
+
+
+@dataclass(frozen=True)
+class Requirement:
+    """One observation query, named by the method and its arguments.
+
+    :param query: Name of the observation method, e.g. ``"price"``.
+    :param args: Positional arguments of the method.
+    """
+
+    query: str
+    args: tuple[Any, ...] = ()
+
+    def fetch(self, obs: BaseObservation) -> Any:
+        """Run the query on ``obs``."""
+        return getattr(obs, self.query)(*self.args)
+
+
+def price(token: str, unit: str, pool: str) -> Requirement:
+    """Price of ``token`` in ``unit`` on a Uniswap V3 pool."""
+    return Requirement("price", (token, unit, pool))
+
+
+def slot0(pool: str) -> Requirement:
+    """Slot0 of a Uniswap V3 pool."""
+    return Requirement("slot0", (pool,))
+
+
+def liquidity(pool: str) -> Requirement:
+    """Active liquidity of a Uniswap V3 pool."""
+    return Requirement("liquidity", (pool,))
+
+
+def active_tick_range(pool: str) -> Requirement:
+    """Active tick range of a Uniswap V3 pool."""
+    return Requirement("active_tick_range", (pool,))
+
+
+def market_info(market_key: str) -> Requirement:
+    """Market info of a GMX V2 market."""
+    return Requirement("get_market_info", (market_key,))
+
+
+class Snapshot(Mapping[Requirement, Any]):
+    """Prefetched values of the requirements of one block.
+
+    :param block: The block the values were read at.
+    :param values: The value of every requirement.
+    """
+
+    def __init__(  # noqa: D107
+        self,
+        block: Optional[int] = None,
+        values: Optional[dict[Requirement, Any]] = None,
+    ) -> None:
+        self.block = block
+        self._values = values or {}
+
+    def __getitem__(self, requirement: Requirement) -> Any:
+        try:
+            return self._values[requirement]
+        except KeyError:
+            raise KeyError(
+                f"{requirement} was not prefetched for block {self.block}. Add it "
+                "to the data_requirements of the policy."
+            ) from None
+
+    def __iter__(self) -> Iterator[Requirement]:
+        return iter(self._values)
+
+    def __len__(self) -> int:
+        return len(self._values)
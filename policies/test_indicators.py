@@ -0,0 +1,51 @@
+"""Tests of the indicator library."""
+import numpy as np
+import pytest
+
+from policies.indicators import (
+    ATR,
+    EMA,
+    RSI,
+    SMA,
+    BollingerBands,
+    Indicator,
+    RealizedVolatility,
+)
+
+INDICATORS = [
+    SMA(5),
+    EMA(5),
+    RSI(5),
+    RSI(5, wilder=True),
+    BollingerBands(5),
+    RealizedVolatility(5),
+    ATR(5),
+]
+
+
+def _name(indicator: Indicator) -> str:
+    return type(indicator).__name__
+
+
+def _random_walk(n: int) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    return 3000 * np.exp(np.cumsum(rng.normal(0, 0.001, n)))
+
+
+@pytest.mark.parametrize("indicator", INDICATORS, ids=_name)
+@pytest.mark.parametrize("n", [0, 1, 3, 50])
+def test_batch_aligns_with_prices(indicator: Indicator, n: int) -> None:
+    values = indicator.batch(_random_walk(n))
+    for series in values if isinstance(values, tuple) else [values]:
+        assert series.shape == (n,)
+
+
+@pytest.mark.parametrize("indicator", INDICATORS, ids=_name)
+def test_update_matches_batch(indicator: Indicator) -> None:
+    prices = _random_walk(200)
+    indicator.clear()
+    streamed = np.array([indicator.update(price) for price in prices])
+    batched = indicator.batch(prices)
+    if isinstance(batched, tuple):
+        batched = np.column_stack(batched)
+    np.testing.assert_allclose(streamed, batched, rtol=1e-10, equal_nan=True)